@@ -3,51 +3,62 @@
 import joblib
 import pandas as pd
 import numpy as np
-from .model import build_quali_vector, flatten_features, driversANDteams
+try:
+    from .features import quali_matrix
+    from .forest import tree_predictions
+except ImportError:  # imported from a training script run in ML/
+    from features import quali_matrix
+    from forest import tree_predictions
 import os
 
 
-def predict_with_confidence(model, X_input):
+def predict_grid_with_confidence(model, X_input):
     pd.set_option('future.no_silent_downcasting', True)
-    # Get predictions from all trees
-    X_array = X_input.values  # Strip column names to avoid warning
-    tree_preds = np.array([tree.predict(X_array)[0] for tree in model.estimators_])
-    mean_prediction = np.mean(tree_preds)
-    std_dev = np.std(tree_preds)
+    if len(X_input) == 0:
+        empty = np.empty(0)
+        return empty, empty, empty
+    # Get predictions from all trees for every row at once: (rows x trees)
+    X_array = X_input.to_numpy(dtype=np.float32)  # Strip column names to avoid warning, convert once for all trees
+    tree_preds = tree_predictions(model, X_array)  # sklearn forest or its compiled arrays
+    mean_prediction = np.mean(tree_preds, axis=1)
+    std_dev = np.std(tree_preds, axis=1)
 
     # Soft normalization for confidence: lower std = higher confidence
     confidence = 1 - (std_dev / (std_dev + 1))  # bounded in (0, 1)
     return mean_prediction, confidence, std_dev
 
-def predict_quali_order(season, round_number, race_name, model):
-    # Load trained model
+def predict_with_confidence(model, X_input):
+    # single row version of predict_grid_with_confidence
+    mean_prediction, confidence, std_dev = predict_grid_with_confidence(model, X_input.iloc[:1])
+    return mean_prediction[0], confidence[0], std_dev[0]
 
-    # Collect drivers and teams for the race
-    drivers, teams = driversANDteams(season, round_number)
+def rank_predictions(drivers, scores, confidences, stds):
+    # Sort drivers by predicted score (lower = better position), in the format the race model and the API use
+    predictions = sorted(zip(drivers, scores, confidences, stds), key=lambda x: x[1])
+    return [
+        {"Driver": driver, "Values": {"Pos": idx, "Score": score, "Std Dev": std, "Confidence": confidence}}
+        for idx, (driver, score, confidence, std) in enumerate(predictions, 1)
+    ]
 
-    predictions = []
+def print_predictions(order):
+    for r in order:
+        v = r["Values"]
+        print(f"{v['Pos']:2d}. {r['Driver']:25} Score: {v['Score']:.3f} | Std Dev: {v['Std Dev']:.3f} | Confidence: {v['Confidence']:.2f}")
 
-    for driver in drivers:
-        try:
-            features = build_quali_vector(driver, teams[driver], season, race_name, round_number)
-            flat_features = flatten_features(features)
-            X_input = pd.DataFrame([flat_features]).infer_objects(copy=False).fillna(0)
+def predict_quali_order(season, round_number, race_name, model):
+    # Load trained model
 
-            score, confidence, std = predict_with_confidence(model, X_input)
-            predictions.append((driver, score, confidence, std))
-        except Exception as e:
-            print(f"Error predicting for {driver}: {e}")
+    # Feature matrix for every driver on the grid, precomputed at ingestion when available
+    X = quali_matrix(season, round_number, race_name).infer_objects(copy=False).fillna(0)
 
-    # Sort drivers by predicted score (lower = better position)
-    predictions.sort(key=lambda x: x[1])
+    # Score the whole grid against every tree in one go
+    scores, confidences, stds = predict_grid_with_confidence(model, X)
 
     #returned values for race model
-    rval = []
+    rval = rank_predictions(X.index, scores, confidences, stds)
     # Display prediction
     print(f"\n📊 Predicted Qualifying order for {race_name} {season} (Using data from R{round_number}):\n")
-    for idx, (driver, score, confidence, std) in enumerate(predictions, 1):
-        print(f"{idx:2d}. {driver:25} Score: {score:.3f} | Std Dev: {std:.3f} | Confidence: {confidence:.2f}")
-        rval.append({"Driver": driver, "Values":{"Pos":idx, "Score": score, "Std Dev": std, "Confidence": confidence}})
+    print_predictions(rval)
     return rval
 
 if __name__ == "__main__":
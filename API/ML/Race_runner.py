@@ -1,67 +1,57 @@
 # predict_model.py
 
-import joblib
-import pandas as pd
 import numpy as np
-import os
-from .model import build_winrate_feature_vector, flatten_features, driversANDteams
+from .features import race_matrix
+from .model import add_quali_predictions
 from .Quali_runner import *
+from .registry import default_registry
+from .simulation import finishing_distribution
 
 
-def predict_with_confidence(model, X_input):
-    pd.set_option('future.no_silent_downcasting', True)
-    # Get predictions from all trees
-    X_array = X_input.values  # Strip column names to avoid warning
-    tree_preds = np.array([tree.predict(X_array)[0] for tree in model.estimators_])
-    mean_prediction = np.mean(tree_preds)
-    std_dev = np.std(tree_preds)
+def race_grid(season, round_number, race_name, order):
+    # Feature matrix for every driver on the grid (precomputed at ingestion when available), with the predicted qualifying order attached
+    return add_quali_predictions(race_matrix(season, round_number, race_name), order).infer_objects(copy=False).fillna(0)
 
-    # Soft normalization for confidence: lower std = higher confidence
-    confidence = 1 - (std_dev / (std_dev + 1))  # bounded in (0, 1)
-    return mean_prediction, confidence, std_dev
+def predict_race_order(season, round_number, race_name, model=None, m=None, order=None):
+    # Trained models: the API passes in the ones its registry holds, anything else uses this process's
+    # registry, loaded once (memory-mapped) instead of unpickling both forests on every call
+    if model is None:
+        model = default_registry().get("race")
 
-def predict_race_order(season, round_number, race_name):
-    # Load trained model
-    model_path = os.path.join(os.path.dirname(__file__), "f1_position_predictor.pkl")
-    model = joblib.load(model_path)
-    m_path = os.path.join(os.path.dirname(__file__), "f1_qualifying_predictor.pkl")
-    m = joblib.load(m_path)
+    # order: predicted qualifying order from predict_quali_order, only computed here if the caller doesn't have it
+    if order is None:
+        if m is None:
+            m = default_registry().get("quali")
+        order = predict_quali_order(season, round_number, race_name, m)
 
-    # Collect drivers and teams for the race
-    drivers, teams = driversANDteams(season, round_number)
-    order = predict_quali_order(season, round_number, race_name, m)
+    X = race_grid(season, round_number, race_name, order)
 
-    predictions = []
+    # Score the whole grid against every tree in one go
+    scores, confidences, stds = predict_grid_with_confidence(model, X)
 
-    for driver in drivers:
-        try:
-            features = build_winrate_feature_vector(driver, teams[driver], season, race_name, round_number)
-            
-            for r in order:
-                if r["Driver"] == driver:
-                    features["Qualifying_Predictions"] = r["Values"]
-            flat_features = flatten_features(features)
-            X_input = pd.DataFrame([flat_features]).infer_objects(copy=False).fillna(0)
-
-            score, confidence, std = predict_with_confidence(model, X_input)
-            predictions.append((driver, score, confidence, std))
-        except Exception as e:
-            print(f"Error predicting for {driver}: {e}")
-
-    # Sort drivers by predicted score (lower = better position)
-    predictions.sort(key=lambda x: x[1])
-
-    #Return Value
-    rval = []
+    #Return Value, sorted by predicted score (lower = better position)
+    rval = rank_predictions(X.index, scores, confidences, stds)
 
     # Display prediction
     print(f"\n📊 Predicted finishing order for {race_name} {season} (Using data from R{round_number}):\n")
-    for idx, (driver, score, confidence, std) in enumerate(predictions, 1):
-        print(f"{idx:2d}. {driver:25} Score: {score:.3f} | Std Dev: {std:.3f} | Confidence: {confidence:.2f}")
-        rval.append({"Driver": driver, "Values":{"Pos":idx, "Score": score, "Std Dev": std, "Confidence": confidence}})
+    print_predictions(rval)
 
     return rval
 
+def predict_finishing_distribution(season, round_number, race_name, model, order, simulations=10000, seed=None, budget=None):
+    # Monte Carlo finishing positions drawn from every tree's prediction, instead of only their mean
+    X = race_grid(season, round_number, race_name, order)
+    tree_preds = tree_predictions(model, X.to_numpy(dtype=np.float32))
+    return finishing_distribution(list(X.index), tree_preds, simulations, seed, budget)
+
+def predict_race_weekend(season, round_number, race_name, model=None, m=None):
+    # Qualifying is predicted once and fed straight into the race model
+    if m is None:
+        m = default_registry().get("quali")
+    quali = predict_quali_order(season, round_number, race_name, m)
+    race = predict_race_order(season, round_number, race_name, model, order=quali)
+    return quali, race
+
 if __name__ == "__main__":
     predict_race_order(2025, 14, "Dutch Grand Prix") # Predict the order for the 2025 dutch gp using data up to r14
  
\ No newline at end of file
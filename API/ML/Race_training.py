@@ -1,5 +1,6 @@
 from model import *
-from Quali_runner import *
+from dataset import build_dataset
+from registry import save_model
 import csv
 import pandas as pd
 import joblib
@@ -8,42 +9,8 @@ from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import r2_score, mean_squared_error
 
 def train_model():
-    dataset = []
-    model = joblib.load("f1_qualifying_predictor.pkl")
-
-
-    for season in range(2020, 2025):  # Training up to 2024
-        with open(f"data/{season}/schedule.csv", "r") as schedule_file:
-            schedule_reader = csv.DictReader(schedule_file)
-            for row in schedule_reader:
-                round_num = int(row["Race"])
-
-                race = row["Name"]
-                order = predict_quali_order(season, round_num, race, model)
-
-                try:
-                    with open(f"data/{season}/{race} R.csv", "r") as result_file:
-                        result_reader = csv.DictReader(result_file)
-                        for row in result_reader:
-                            driver = row["FullName"]
-                            team = row["TeamName"]
-                            try:
-                                winrate = build_winrate_feature_vector(driver, team, season, race, round_num)
-                                for r in order:
-                                    if r["Driver"] == driver:
-                                        winrate["Qualifying_Predictions"] = r["Values"]
-                                features = flatten_features(winrate)
-                                target_position = int(get_race_results(driver, season, race))
-                                features["FinalPosition"] = target_position
-                                dataset.append(features)
-                            except Exception as e:
-                                print(f"[TRAIN] Error with {driver} at {season} {race}: {e}")
-                except FileNotFoundError:
-                    continue
-
-
-    # DataFrame
-    df = pd.DataFrame(dataset).fillna(0)
+    # Feature rows for every race up to 2024, reused from earlier runs where the data hasn't changed
+    df = build_dataset("race", range(2020, 2025))  # Training up to 2024
     X = df.drop(columns=["FinalPosition"])
     y = df["FinalPosition"]
 
@@ -79,7 +46,7 @@ def train_model():
         print(f"{name:30}: {importance:.4f}")
 
     # Save model
-    joblib.dump(model, "f1_position_predictor.pkl")
+    save_model(model, "f1_position_predictor.pkl")  # atomic, so a running API can swap it in
     print("✅ Model saved as f1_position_predictor.pkl")
 
 
@@ -0,0 +1,86 @@
+# Season projection: every remaining race predicted from the latest round's data, then the championships simulated
+
+import numpy as np
+import pandas as pd
+from .features import quali_matrix, race_matrix
+from .forest import tree_predictions
+from .model import add_quali_predictions, driversANDteams
+from .Quali_runner import predict_grid_with_confidence, rank_predictions
+from .registry import default_registry
+from .simulation import championship_counts, standings_distribution
+from .store import get_store
+from .teams import constructor_id
+
+
+def current_points(season, latest_round, drivers, team_names):
+    # championship points after latest_round: drivers summed from the race results, constructors from Team Scores.csv
+    data = get_store().season(season)
+    raced = data.results[data.results["Round"] <= latest_round]
+    scored = pd.Series(raced["Points"].to_numpy(dtype=float), index=raced["FullName"].to_numpy(dtype=object))
+    totals = scored.groupby(level=0).sum()
+    driver_points = np.array([totals.get(driver, 0.0) for driver in drivers], dtype=float)
+    team_points = np.array([data.standings.at(latest_round, constructor_id(team))[0] or 0.0 for team in team_names], dtype=float)
+    return driver_points, team_points
+
+
+def season_tree_predictions(season, latest_round, races, quali_model, race_model):
+    """(grid, races x drivers x trees) race-model tree predictions for every remaining race.
+
+    Features that don't depend on the track are computed once for the whole season, every race's
+    qualifying is scored in a single pass over the trees and so is every race, each with its own
+    predicted qualifying order. grid: the drivers in every race's matrix.
+    """
+    shared = {}
+    qualis = [quali_matrix(season, latest_round, race, shared).infer_objects(copy=False).fillna(0) for race in races]
+    scores, confidences, stds = predict_grid_with_confidence(quali_model, pd.concat(qualis))
+
+    grids, start = [], 0
+    for race, X in zip(races, qualis):
+        stop = start + len(X)
+        order = rank_predictions(X.index, scores[start:stop], confidences[start:stop], stds[start:stop])
+        grids.append(add_quali_predictions(race_matrix(season, latest_round, race, shared), order).infer_objects(copy=False).fillna(0))
+        start = stop
+
+    grid = [driver for driver in grids[0].index if all(driver in X.index for X in grids)]
+    X = pd.concat([X.loc[grid] for X in grids])
+    tree_preds = tree_predictions(race_model, X.to_numpy(dtype=np.float32))
+    return grid, tree_preds.reshape(len(races), len(grid), -1)
+
+
+def project_season(season, latest_round, quali_model=None, race_model=None, simulations=10000, seed=None, budget=None):
+    """Drivers' and constructors' championship chances, simulating every race after latest_round.
+
+    Each simulated season draws every remaining race from the spread of the forest's trees, scores
+    the standard top ten points on top of the current standings and ranks the final totals.
+    Returns the simulations run, the races simulated and both championships sorted by expected points.
+    """
+    if quali_model is None:
+        quali_model = default_registry().get("quali")
+    if race_model is None:
+        race_model = default_registry().get("race")
+
+    races = [name for rnd, name in get_store().season(season).schedule.upcoming(latest_round)]
+    entrants = driversANDteams(season, latest_round)
+    if entrants is None:
+        raise ValueError(f"Round {latest_round} isn't on the {season} schedule")
+    drivers, teams = entrants
+    if races:
+        grid, tree_preds = season_tree_predictions(season, latest_round, races, quali_model, race_model)
+    else:
+        grid, tree_preds = drivers, np.zeros((0, len(drivers), 1))  # season over: the standings are final
+
+    team_names = list(dict.fromkeys(teams[driver] for driver in grid))
+    team_of = np.zeros((len(grid), len(team_names)))
+    team_of[np.arange(len(grid)), [team_names.index(teams[driver]) for driver in grid]] = 1
+    driver_points, team_points = current_points(season, latest_round, grid, team_names)
+
+    rng = np.random.default_rng(seed)
+    driver_counts, team_counts, driver_sums, team_sums, done = championship_counts(
+        tree_preds, driver_points, team_of, team_points, simulations, rng, budget)
+
+    return {
+        "simulations": done,
+        "races": races,
+        "drivers": standings_distribution([{"Driver": driver, "Team": teams[driver]} for driver in grid], driver_counts, driver_sums, driver_points, done),
+        "constructors": standings_distribution([{"Team": team} for team in team_names], team_counts, team_sums, team_points, done),
+    }
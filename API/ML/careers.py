@@ -0,0 +1,89 @@
+import math
+import threading
+
+import numpy as np
+
+# per (driver, constructor id): races with a finish, finish sum, finish sum of squares,
+# races with a grid gain, grid gain sum, races with a teammate finish, teammate delta sum
+FINISHES, FINISH_SUM, FINISH_SQ_SUM, GAINS, GAIN_SUM, LUCKS, LUCK_SUM = range(7)
+
+
+def add_race(totals, race):
+    # fold one race into the totals, keyed on the constructor each driver raced for
+    for driver, i in race.rows.items():
+        cid = race.team_id[i]
+        finish = race.position[i]
+        if np.isnan(finish):
+            continue
+        teammate = None
+        for j in np.flatnonzero(race.team_id == cid):
+            if j != i:
+                teammate = j
+
+        row = totals.setdefault((driver, int(cid)), [0] * 7)
+        row[FINISHES] += 1
+        row[FINISH_SUM] += int(finish)
+        row[FINISH_SQ_SUM] += int(finish) ** 2
+        if not np.isnan(race.grid[i]):
+            row[GAINS] += 1
+            row[GAIN_SUM] += int(race.grid[i]) - int(finish)
+        if teammate is not None and not np.isnan(race.position[teammate]):
+            row[LUCKS] += 1
+            row[LUCK_SUM] += int(race.position[teammate]) - int(finish)
+
+
+def merge(into, totals):
+    for key, row in totals.items():
+        target = into.setdefault(key, [0] * 7)
+        for k, value in enumerate(row):
+            target[k] += value
+
+
+_seasons = {}  # season -> (SeasonData, totals of that season)
+_cumulative = {}  # last season -> (SeasonData objects, totals of every season up to it)
+_lock = threading.Lock()
+
+
+def season_totals(data):
+    # one season's totals, recomputed only when the store hands out a reloaded SeasonData for it
+    cached = _seasons.get(data.season)
+    if cached is None or cached[0] is not data:
+        totals = {}
+        for race in data.races.values():
+            add_race(totals, race)
+        cached = (data, totals)
+        with _lock:
+            _seasons[data.season] = cached
+    return cached[1]
+
+
+def career_table(seasons):
+    """Career totals over the given consecutive seasons, built as a running sum season by season.
+
+    Each prefix is cached, so adding a race only recomputes that season's totals and the prefixes after it.
+    """
+    if not seasons:
+        return {}
+    last = seasons[-1]
+    cached = _cumulative.get(last.season)
+    if cached is None or len(cached[0]) != len(seasons) or any(a is not b for a, b in zip(cached[0], seasons)):
+        totals = {}
+        merge(totals, career_table(seasons[:-1]))
+        merge(totals, season_totals(last))
+        cached = (tuple(seasons), totals)
+        with _lock:
+            _cumulative[last.season] = cached
+    return cached[1]
+
+
+def luck_factor(table, driver, cid):
+    # (Avg Gain, Avg Luck, Std Dev of finishes) of the driver's career races for this constructor
+    row = table.get((driver, cid))
+    if row is None:
+        return 0, 0, 0
+    avg_gain = row[GAIN_SUM] / row[GAINS] if row[GAINS] else 0
+    avg_luck = row[LUCK_SUM] / row[LUCKS] if row[LUCKS] else 0
+    n = row[FINISHES]
+    # population std from integer sums, so the variance is exact before the one division
+    std = math.sqrt((n * row[FINISH_SQ_SUM] - row[FINISH_SUM] ** 2) / (n * n)) if n > 1 else 0
+    return avg_gain, avg_luck, std
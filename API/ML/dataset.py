@@ -0,0 +1,158 @@
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+
+try:
+    from .model import FEATURE_VERSION, add_quali_predictions, build_quali_matrix, build_winrate_feature_matrix, get_quali_results, get_race_results
+    from .Quali_runner import predict_grid_with_confidence, rank_predictions
+    from .registry import file_version
+    from .store import DATA_DIR, get_store, season_digest
+except ImportError:  # run as a script from ML/ (training)
+    from model import FEATURE_VERSION, add_quali_predictions, build_quali_matrix, build_winrate_feature_matrix, get_quali_results, get_race_results
+    from Quali_runner import predict_grid_with_confidence, rank_predictions
+    from registry import file_version
+    from store import DATA_DIR, get_store, season_digest
+
+MODEL_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Per-race training rows from earlier runs, reused while their inputs are unchanged
+TRAINING_DIR = os.path.join(DATA_DIR, "training")
+
+
+def training_races(seasons):
+    # (season, round, race) for every scheduled race, in schedule order
+    races = []
+    for season in seasons:
+        races.extend((season, rnd, name) for rnd, name in get_store().season(season).schedule)
+    return races
+
+
+def _rows(matrix, target, season, race, result):
+    # feature dicts with the actual result attached, plus the messages for drivers without one
+    rows, errors = [], []
+    for driver, features in matrix.to_dict(orient="index").items():
+        try:
+            features[target] = int(result(driver, season, race))
+            rows.append(features)
+        except Exception as e:
+            errors.append(f"[TRAIN] Error with {driver} at {season} {race}: {e}")
+    return rows, errors
+
+
+def quali_rows(season, round_num, race):
+    try:
+        matrix = build_quali_matrix(season, round_num, race)
+    except FileNotFoundError:
+        return [], []
+    return _rows(matrix, "GridPosition", season, race, get_quali_results)
+
+
+def race_rows(season, round_num, race, quali_order):
+    try:
+        matrix = build_winrate_feature_matrix(season, round_num, race)
+    except FileNotFoundError:
+        return [], []
+    matrix = add_quali_predictions(matrix, quali_order)
+    return _rows(matrix, "FinalPosition", season, race, get_race_results)
+
+
+def _run(fn, tasks, workers):
+    # fn(*task) for every task, results in task order
+    if workers == 1 or len(tasks) <= 1:
+        return [fn(*task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # map yields in submission order
+        return list(pool.map(fn, *zip(*tasks)))
+
+
+def bulk_quali_orders(races, model, workers=1):
+    """Predicted qualifying order for every (season, round, race), as predict_quali_order would return it.
+
+    Builds the quali feature matrix of every race, stacks them and scores all rows against the forest
+    in one call, then splits the scores back per race and ranks each grid.
+    """
+    matrices = _run(build_quali_matrix, races, workers)
+    X = pd.concat(matrices, keys=range(len(races)), names=["Task", "Driver"]).infer_objects(copy=False).fillna(0)
+    scores, confidences, stds = predict_grid_with_confidence(model, X)
+
+    drivers = X.index.get_level_values("Driver")
+    offsets = np.cumsum([0] + [len(matrix) for matrix in matrices])
+    return [
+        rank_predictions(drivers[start:stop], scores[start:stop], confidences[start:stop], stds[start:stop])
+        for start, stop in zip(offsets[:-1], offsets[1:])
+    ]
+
+
+# kind -> (row builder, model file the rows also depend on)
+KINDS = {
+    "quali": (quali_rows, None),
+    "race": (race_rows, "f1_qualifying_predictor.pkl"),
+}
+
+
+def _cache_path(kind, season, round_num, race):
+    return os.path.join(TRAINING_DIR, kind, str(season), f"{round_num:02d} {race}.pkl")
+
+
+def _read_cached(path, source):
+    try:
+        with open(path, "rb") as file:
+            cached = pickle.load(file)
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        return None
+    return cached["result"] if cached["source"] == source else None
+
+
+def _write_cached(path, source, result):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as file:
+        pickle.dump({"source": source, "result": result}, file)
+    os.replace(tmp_path, path)
+
+
+def build_dataset(kind, seasons, workers=None):
+    """Training DataFrame for every race of the given seasons.
+
+    Each race's rows are cached on disk, tagged with FEATURE_VERSION, a hash of the season files they
+    were built from and (for race rows) the quali model version; only races whose tag changed are
+    rebuilt, one process per (season, race) task. Results are merged in schedule order whatever
+    order the workers finish in, so the frame is the same as building it race by race on one core.
+    """
+    build_rows, model_file = KINDS[kind]
+    races = training_races(seasons)
+    workers = workers or int(os.environ.get("F1_TRAIN_WORKERS", 0)) or os.cpu_count() or 1
+
+    store = get_store()
+    digests = {season: season_digest(os.path.join(store.data_dir, str(season))) for season in range(2020, max(seasons) + 1)}
+    model_version = file_version(os.path.join(MODEL_DIR, model_file)) if model_file else None
+
+    results, sources, missing = [], [], []
+    for i, (season, round_num, race) in enumerate(races):
+        source = (FEATURE_VERSION, model_version, tuple(digests[s] for s in range(2020, season + 1)))
+        sources.append(source)
+        results.append(_read_cached(_cache_path(kind, season, round_num, race), source))
+        if results[i] is None:
+            missing.append(i)
+    print(f"[TRAIN] {kind}: {len(races) - len(missing)} races cached, building {len(missing)}")
+
+    todo = [races[i] for i in missing]
+    if kind == "race" and todo:
+        # Qualifying_Predictions for every race being built, scored in one pass rather than race by race
+        orders = bulk_quali_orders(todo, joblib.load(os.path.join(MODEL_DIR, model_file)), workers)
+        todo = [race + (order,) for race, order in zip(todo, orders)]
+    built = _run(build_rows, todo, workers)
+    for i, result in zip(missing, built):
+        results[i] = result
+        _write_cached(_cache_path(kind, *races[i]), sources[i], result)
+
+    dataset = []
+    for rows, errors in results:
+        for error in errors:
+            print(error)
+        dataset.extend(rows)
+    return pd.DataFrame(dataset).fillna(0)
@@ -0,0 +1,142 @@
+import os
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .model import FEATURE_VERSION, build_quali_matrix, build_winrate_feature_matrix
+    from .store import DATA_DIR, get_store
+except ImportError:
+    from model import FEATURE_VERSION, build_quali_matrix, build_winrate_feature_matrix
+    from store import DATA_DIR, get_store
+
+# Feature rows for upcoming races, precomputed once per ingestion so predictions are a lookup.
+# Kept outside the season folders so writing them doesn't change the season fingerprints.
+FEATURE_DIR = os.path.join(DATA_DIR, "features")
+
+BUILDERS = {
+    "quali": build_quali_matrix,
+    "race": build_winrate_feature_matrix,  # without the Qualifying_Predictions_* columns, those are added per request
+}
+
+
+def feature_path(season):
+    return os.path.join(FEATURE_DIR, f"{season}.npz")
+
+
+def latest_completed_round(season):
+    data = get_store().season(season)
+    rounds = [race.round for race in data.races.values()]
+    return max(rounds) if rounds else 0
+
+
+def materialize(season, latest_round=None):
+    # build both feature matrices for every race after latest_round and write them to data/features/<season>.npz
+    store = get_store()
+    store.reload()
+    if latest_round is None:
+        latest_round = latest_completed_round(season)
+    fingerprint = store.fingerprint(range(2020, season + 1))
+    upcoming = [name for rnd, name in store.season(season).schedule.upcoming(latest_round)]
+    shared = {}  # season-wide feature values, computed once for all the upcoming races
+
+    arrays = {
+        "version": np.array(FEATURE_VERSION),
+        "latest_round": np.array(latest_round),
+        "fingerprint": np.array([f or "" for f in fingerprint]),
+    }
+    for kind, builder in BUILDERS.items():
+        columns = None
+        races, drivers, offsets, values = [], [], [0], []
+        for race_name in upcoming:
+            matrix = builder(season, latest_round, race_name, shared=shared)
+            if len(matrix) == 0:
+                continue
+            if columns is None:
+                columns = list(matrix.columns)
+            elif list(matrix.columns) != columns:
+                # odd shape, leave this race to live computation
+                print(f"Skipping {kind} features for {race_name}: unexpected columns")
+                continue
+            races.append(race_name)
+            drivers.extend(matrix.index)
+            offsets.append(offsets[-1] + len(matrix))
+            values.append(matrix.to_numpy(dtype=np.float64))
+        arrays[f"{kind}_columns"] = np.array(columns or [], dtype=str)
+        arrays[f"{kind}_races"] = np.array(races, dtype=str)
+        arrays[f"{kind}_drivers"] = np.array(drivers, dtype=str)
+        arrays[f"{kind}_offsets"] = np.array(offsets, dtype=np.int64)
+        arrays[f"{kind}_values"] = np.vstack(values) if values else np.empty((0, len(columns or [])))
+
+    os.makedirs(FEATURE_DIR, exist_ok=True)
+    path = feature_path(season)
+    tmp_path = path + ".tmp.npz"
+    np.savez_compressed(tmp_path, **arrays)
+    os.replace(tmp_path, path)  # readers only ever see a complete file
+    print(f"Wrote features for {len(upcoming)} races of {season} (data up to R{latest_round}) to {path}")
+    return path
+
+
+_loaded = {}  # season -> (mtime_ns, arrays)
+_loaded_lock = threading.Lock()
+
+
+def _load(season):
+    path = feature_path(season)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    with _loaded_lock:
+        cached = _loaded.get(season)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        with np.load(path) as file:
+            arrays = {key: file[key] for key in file.files}
+        _loaded[season] = (mtime, arrays)
+        return arrays
+
+
+def lookup(kind, season, latest_round, race_name):
+    # precomputed feature matrix, or None if there isn't an up-to-date one for this race
+    arrays = _load(season)
+    if arrays is None or int(arrays["version"]) != FEATURE_VERSION or int(arrays["latest_round"]) != latest_round:
+        return None
+    current = [f or "" for f in get_store().fingerprint(range(2020, season + 1))]
+    if arrays["fingerprint"].tolist() != current:
+        return None
+    races = arrays[f"{kind}_races"].tolist()
+    if race_name not in races:
+        return None
+    i = races.index(race_name)
+    start, stop = arrays[f"{kind}_offsets"][i], arrays[f"{kind}_offsets"][i + 1]
+    matrix = pd.DataFrame(
+        arrays[f"{kind}_values"][start:stop],
+        index=pd.Index(arrays[f"{kind}_drivers"][start:stop].tolist(), name="Driver"),
+        columns=arrays[f"{kind}_columns"].tolist(),
+    )
+    return matrix
+
+
+def quali_matrix(season, latest_round, race_name, shared=None):
+    # shared: see GridContext.shared, for callers predicting several races from the same round
+    matrix = lookup("quali", season, latest_round, race_name)
+    if matrix is None:
+        matrix = build_quali_matrix(season, latest_round, race_name, shared=shared)
+    return matrix
+
+
+def race_matrix(season, latest_round, race_name, shared=None):
+    matrix = lookup("race", season, latest_round, race_name)
+    if matrix is None:
+        matrix = build_winrate_feature_matrix(season, latest_round, race_name, shared=shared)
+    return matrix
+
+
+if __name__ == "__main__":
+    # run after helpers/raceAddition.py: python features.py <season> [latest_round]
+    season = int(sys.argv[1]) if len(sys.argv) > 1 else 2025
+    latest_round = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    materialize(season, latest_round)
@@ -0,0 +1,130 @@
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+
+# arrays of a compiled forest, one .npy file each so they can be memory-mapped
+ARRAYS = ("feature", "threshold", "children", "value", "roots")
+
+# bump when the layout of the exported arrays changes
+FOREST_FORMAT = 1
+
+
+class CompiledForest:
+    """A trained sklearn forest flattened into contiguous arrays, every tree's nodes one after the other.
+
+    feature/threshold: split of each node; children: (nodes x 2) left/right child, a leaf points at itself
+    (with an always-true split) so a walk can run a fixed number of steps; value: leaf prediction;
+    roots: first node of each tree. Scoring walks every (row, tree) pair down one level per step at once.
+    """
+
+    def __init__(self, arrays, n_features_in, depth, source=None):
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.children = arrays["children"]
+        self.value = arrays["value"]
+        self.roots = arrays["roots"]
+        self.n_features_in_ = n_features_in
+        self.n_estimators = len(self.roots)
+        self.depth = depth
+        self.source = source  # version of the .pkl it was compiled from
+
+    def tree_predictions(self, X):
+        # (rows x trees) predictions, equal to calling every sklearn tree's predict on X
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(len(X))[:, None]
+        node = np.broadcast_to(self.roots, (len(X), self.n_estimators))
+        for _ in range(self.depth):
+            # float32 inputs against float64 thresholds, the same comparison sklearn's trees make
+            go_right = X[rows, self.feature[node]] > self.threshold[node]
+            node = self.children[node, go_right.astype(np.intp)]
+        return self.value[node]
+
+
+def compile_forest(model, source=None):
+    features, thresholds, children, values, roots = [], [], [], [], []
+    offset = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        nodes = np.arange(tree.node_count)
+        leaf = tree.children_left == -1
+        roots.append(offset)
+        features.append(np.where(leaf, 0, tree.feature))
+        thresholds.append(np.where(leaf, np.inf, tree.threshold))
+        children.append(np.column_stack([
+            np.where(leaf, nodes, tree.children_left),
+            np.where(leaf, nodes, tree.children_right),
+        ]) + offset)
+        values.append(tree.value[:, 0, 0])
+        offset += tree.node_count
+
+    arrays = {
+        "feature": np.concatenate(features).astype(np.int32),
+        "threshold": np.concatenate(thresholds).astype(np.float64),
+        "children": np.concatenate(children).astype(np.int32),
+        "value": np.concatenate(values).astype(np.float64),
+        "roots": np.array(roots, dtype=np.int64),
+    }
+    depth = max(estimator.tree_.max_depth for estimator in model.estimators_)
+    return CompiledForest(arrays, int(model.n_features_in_), int(depth), source)
+
+
+def save_forest(forest, path):
+    # a folder of .npy files plus meta.json, written next to it and renamed into place
+    tmp_path = f"{path}.tmp{os.getpid()}"  # workers compiling the same model at once don't share it
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    for name in ARRAYS:
+        np.save(os.path.join(tmp_path, f"{name}.npy"), getattr(forest, name))
+    with open(os.path.join(tmp_path, "meta.json"), "w") as file:
+        json.dump({"format": FOREST_FORMAT, "n_features_in": forest.n_features_in_, "depth": forest.depth, "source": forest.source}, file)
+    try:
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+    except OSError:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+
+def load_forest(path, mmap=True):
+    """CompiledForest saved by save_forest, or None if there isn't one in a format this code reads.
+
+    With mmap the arrays are read-only views of the files, so loading is near instant and every
+    process that loads the same forest shares one copy through the page cache.
+    """
+    try:
+        with open(os.path.join(path, "meta.json"), "r") as file:
+            meta = json.load(file)
+    except FileNotFoundError:
+        return None
+    if meta.get("format") != FOREST_FORMAT:
+        return None
+    arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r" if mmap else None) for name in ARRAYS}
+    return CompiledForest(arrays, meta["n_features_in"], meta["depth"], meta["source"])
+
+
+def forest_path(pkl_path):
+    # f1_qualifying_predictor.pkl -> f1_qualifying_predictor.forest
+    return os.path.splitext(pkl_path)[0] + ".forest"
+
+
+def tree_predictions(model, X):
+    # (rows x trees) predictions of a CompiledForest or a fitted sklearn forest
+    if isinstance(model, CompiledForest):
+        return model.tree_predictions(X)
+    return np.column_stack([tree.predict(X) for tree in model.estimators_])
+
+
+if __name__ == "__main__":
+    # python forest.py [model.pkl ...]   (default: both trained models)
+    import joblib
+
+    from registry import MODEL_DIR, MODEL_FILES, file_version
+
+    paths = sys.argv[1:] or [os.path.join(MODEL_DIR, file) for file in MODEL_FILES.values()]
+    for path in paths:
+        forest = compile_forest(joblib.load(path), source=file_version(path))
+        save_forest(forest, forest_path(path))
+        print(f"Compiled {os.path.basename(path)}: {forest.n_estimators} trees, {len(forest.value)} nodes -> {forest_path(path)}")
@@ -1,51 +1,109 @@
-import os, csv, collections, fastf1
-import pandas as pd
+import os, csv, io
+from sources import DATA_DIR
 
-def add_standings(season):
+FIELDS = ["Race", "TeamName", "Points", "Placement"]
+
+def last_standings(season_dir):
+    # (last round in Team Scores.csv, its rows as they are in the file); (0, []) when there are none yet
+    try:
+        with open(f"{season_dir}/Team Scores.csv", "r") as f:
+            rows = list(csv.DictReader(f))
+    except FileNotFoundError:
+        return 0, []
+    if not rows:
+        return 0, []
+    last = max(int(row["Race"]) for row in rows)
+    return last, [row for row in rows if int(row["Race"]) == last]
+
+def team_order(season_dir, schedule, standings):
+    # order teams first appeared in the race results, which is how tied teams have always been placed:
+    # the first race's results, then anyone who only shows up in the standings
+    order = {}
+    try:
+        with open(f"{season_dir}/{schedule[1]} R.csv", 'r') as file:
+            for row in csv.DictReader(file):
+                order.setdefault(row["TeamName"], len(order))
+    except (KeyError, FileNotFoundError):
+        pass
+    for row in standings:
+        order.setdefault(row["TeamName"], len(order))
+    return order
+
+def add_standings(season, data_dir=DATA_DIR, incremental=True):
+    """Constructors standings after every raced round, in Team Scores.csv, plus Final Team Scores.csv.
+
+    Incremental by default: starts from the cumulative points of the last round already in Team Scores.csv
+    and only reads the results of the races after it. Pass incremental=False after rewriting results of
+    rounds that are already in the standings. Both files are written in one go through a temp file.
+    """
     SEASON = season
-    totalscores = collections.defaultdict(float)
+    season_dir = os.path.join(data_dir, str(SEASON))
+
+    # round -> event name, from the schedule.csv written by schedule.py
+    with open(f"{season_dir}/schedule.csv", "r") as f:
+        schedule = {int(row["Race"]): row["Name"] for row in csv.DictReader(f)}
 
-    schedule = fastf1.get_event_schedule(SEASON)
-    race = 1
+    last, standings = last_standings(season_dir) if incremental else (0, [])
+    order = team_order(season_dir, schedule, standings)
+    totalscores = {team: 0.0 for team in sorted(order, key=order.get)}
+    for row in standings:
+        totalscores[row["TeamName"]] = float(row["Points"])
+    race = last + 1
 
-    with open(f"../data/{SEASON}/Team Scores.csv", "w") as f:
-        writer = csv.DictWriter(f, fieldnames=["Race", "TeamName", "Points", "Placement"])
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=FIELDS)
+    if last:
+        with open(f"{season_dir}/Team Scores.csv", "r", newline='') as f:
+            buffer.write(f.read())
+    else:
         writer.writeheader()
+    new_rounds = 0
 
     while True:
         try:
-            gp = schedule.get_event_by_round(race)
-            path = f"../data/{SEASON}/{gp['EventName']} R.csv"
+            path = f"{season_dir}/{schedule[race]} R.csv"
 
             with open(path, 'r') as file:
                 reader = csv.DictReader(file)
                 for row in reader:
+                    if row["TeamName"] not in totalscores:
+                        order.setdefault(row["TeamName"], len(order))
+                        totalscores[row["TeamName"]] = 0.0
                     totalscores[row["TeamName"]] += float(row["Points"])
 
-            # Sort teams by current total score
-            sorted_teams = sorted(totalscores.items(), key=lambda x: x[1], reverse=True)
-
-            # Write standings after this race
-            with open(f"../data/{SEASON}/Team Scores.csv", "a") as f:
-                writer = csv.DictWriter(f, fieldnames=["Race", "TeamName", "Points", "Placement"])
-                for i, (team, points) in enumerate(sorted_teams):
-                    writer.writerow({
-                        "Race": race,
-                        "TeamName": team,
-                        "Points": points,
-                        "Placement": i + 1  # Placement starts at 1
-                    })
+            # Sort teams by current total score, ties in the order they first appeared
+            sorted_teams = sorted(totalscores.items(), key=lambda x: (-x[1], order[x[0]]))
 
+            # Standings after this race
+            for i, (team, points) in enumerate(sorted_teams):
+                writer.writerow({
+                    "Race": race,
+                    "TeamName": team,
+                    "Points": points,
+                    "Placement": i + 1  # Placement starts at 1
+                })
+            new_rounds += 1
             race += 1
 
         except Exception:
             break
 
-    # Final cumulative team standings
-    with open(f"../data/{SEASON}/Final Team Scores.csv", "w") as f:
-        writer = csv.DictWriter(f, fieldnames=["TeamName", "TotalPoints"])
-        writer.writeheader()
-        for team, points in sorted(totalscores.items(), key=lambda x: x[1], reverse=True):
-            writer.writerow({"TeamName": team, "TotalPoints": points})
+    if not new_rounds and last:
+        return  # nothing new raced since the last run
 
+    _replace(f"{season_dir}/Team Scores.csv", buffer.getvalue())
+
+    # Final cumulative team standings
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=["TeamName", "TotalPoints"])
+    writer.writeheader()
+    for team, points in sorted(totalscores.items(), key=lambda x: (-x[1], order[x[0]])):
+        writer.writerow({"TeamName": team, "TotalPoints": points})
+    _replace(f"{season_dir}/Final Team Scores.csv", buffer.getvalue())
 
+def _replace(path, text):
+    # single write to a temp file, then an atomic rename over the old file
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", newline='') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
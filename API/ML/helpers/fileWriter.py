@@ -1,6 +1,7 @@
 import fastf1
 import csv
 import os
+from sources import DATA_DIR, FastF1Source
 
 def main():
     keyValues = ["R"]
@@ -23,16 +24,44 @@ def main():
                 except Exception:
                     break
 
-def add_race(season, latest):
-    session = fastf1.get_session(season,latest,"R")
-    session.load()
-    path = os.path.join(f"../data/{season}", f"{session.event['EventName']} R.csv")
+def write_race(season, rnd, source, data_dir=DATA_DIR):
+    # fetch one race's results from the source and write them to data/<season>/<EventName> R.csv
+    name, results = source.race_results(season, rnd)
+    path = os.path.join(data_dir, str(season), f"{name} R.csv")
     os.makedirs(os.path.dirname(path), exist_ok=True)
     with open(path, "w") as file:
-        writer = csv.DictWriter(file, fieldnames=session.results.columns.tolist())
+        writer = csv.DictWriter(file, fieldnames=results.columns.tolist())
         writer.writeheader()
-        for _, row in session.results.iterrows():
+        for _, row in results.iterrows():
             writer.writerow(row.to_dict())
+    return path
+
+def read_rows(path):
+    try:
+        with open(path, "r") as file:
+            return list(csv.DictReader(file))
+    except FileNotFoundError:
+        return []
+
+def write_rows(path, fieldnames, rows):
+    # whole-file rewrite through a temp file, so readers never see a half written CSV
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(tmp_path, path)
+
+def merge_rounds(path, fieldnames, rows):
+    # put rows into a per-round CSV, replacing those rounds and keeping every other one, ordered by round
+    rounds = {int(row["Round"]) for row in rows}
+    kept = [row for row in read_rows(path) if int(row["Round"]) not in rounds]
+    merged = sorted(kept + rows, key=lambda row: int(row["Round"]))  # stable: row order within a round is kept
+    write_rows(path, fieldnames, merged)
+
+def add_race(season, latest):
+    write_race(season, latest, FastF1Source())
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,141 @@
+import argparse
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from fileWriter import merge_rounds, read_rows, write_race, write_rows
+from pitstops import PITSTOP_FIELDS, iter_pitstops
+from rain import RAIN_FIELDS, iter_rain
+from sources import DATA_DIR, FastF1Source, FixtureSource
+from WCCStandings import add_standings, last_standings
+
+# FastF1 http/session cache, so re-running an ingest doesn't download anything twice
+CACHE_DIR = os.environ.get("F1_FASTF1_CACHE", os.path.join(DATA_DIR, "fastf1"))
+
+
+class Checkpoint:
+    """Rounds of one season each ingestion step has finished, in data/ingest/<season>.json.
+
+    Saved after every round, so an interrupted run picks up where it stopped. Without a checkpoint
+    (first run, or data copied in by hand) it is rebuilt from the files already in the season folder.
+    """
+
+    def __init__(self, season, data_dir=DATA_DIR):
+        self.season_dir = os.path.join(data_dir, str(season))
+        self.path = os.path.join(data_dir, "ingest", f"{season}.json")
+        self.lock = threading.Lock()
+        try:
+            with open(self.path, "r") as file:
+                self.done = {step: set(rounds) for step, rounds in json.load(file).items()}
+        except FileNotFoundError:
+            self.done = self._from_files()
+
+    def _from_files(self):
+        schedule = read_rows(os.path.join(self.season_dir, "schedule.csv"))
+        return {
+            "results": {int(row["Race"]) for row in schedule
+                        if os.path.exists(os.path.join(self.season_dir, f"{row['Name']} R.csv"))},
+            "rain": {int(row["Round"]) for row in read_rows(os.path.join(self.season_dir, "rain.csv"))},
+            "pitstops": {int(row["Round"]) for row in read_rows(os.path.join(self.season_dir, "pitstops.csv"))},
+        }
+
+    def missing(self, step, rounds):
+        with self.lock:
+            done = self.done.get(step, set())
+            return [rnd for rnd in rounds if rnd not in done]
+
+    def mark(self, step, rnd):
+        with self.lock:
+            self.done.setdefault(step, set()).add(rnd)
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as file:
+                json.dump({step: sorted(rounds) for step, rounds in self.done.items()}, file)
+            os.replace(tmp_path, self.path)
+
+
+def ingest_results(season, rounds, source, checkpoint, data_dir):
+    for rnd in checkpoint.missing("results", rounds):
+        write_race(season, rnd, source, data_dir)
+        checkpoint.mark("results", rnd)
+        print(f"Saved race {rnd} of {season}")
+
+
+def ingest_rain(season, rounds, source, checkpoint, data_dir):
+    path = os.path.join(data_dir, str(season), "rain.csv")
+    # sessions load in parallel but arrive in round order, each saved as soon as it's in
+    for row in iter_rain(season, checkpoint.missing("rain", rounds), source):
+        merge_rounds(path, RAIN_FIELDS, [row])
+        checkpoint.mark("rain", row["Round"])
+        print(f"Saved rain for round {row['Round']} of {season}")
+
+
+def ingest_pitstops(season, rounds, source, checkpoint, data_dir):
+    path = os.path.join(data_dir, str(season), "pitstops.csv")
+    for rnd, team_avg in iter_pitstops(season, checkpoint.missing("pitstops", rounds), source):
+        if team_avg.empty:
+            # raced without pit stop data: nothing to write, but done, so later rounds aren't held up by it
+            checkpoint.mark("pitstops", rnd)
+            print(f"No pitstops for round {rnd} of {season}")
+            continue
+        merge_rounds(path, PITSTOP_FIELDS, team_avg.to_dict(orient="records"))
+        checkpoint.mark("pitstops", rnd)
+        print(f"Saved pitstops for round {rnd} of {season}")
+
+
+STEPS = {
+    "results": ingest_results,
+    "rain": ingest_rain,
+    "pitstops": ingest_pitstops,
+}
+
+
+def _run_step(step, season, rounds, source, checkpoint, data_dir):
+    # a step stops at the first round the source can't provide yet (not raced); the next run retries from there
+    try:
+        STEPS[step](season, rounds, source, checkpoint, data_dir)
+        return None
+    except Exception as e:
+        print(f"[INGEST] {step} stopped: {e}")
+        return e
+
+
+def ingest(season, latest_round, source, data_dir=DATA_DIR):
+    """Bring data/<season> up to latest_round, fetching only the rounds not ingested yet.
+
+    Race results, rain and pitstops don't depend on each other and are fetched concurrently;
+    the constructors standings are brought up to date from the race results once those are in.
+    Returns step -> exception for the steps that didn't get to latest_round.
+    """
+    season_dir = os.path.join(data_dir, str(season))
+    os.makedirs(season_dir, exist_ok=True)
+    schedule_path = os.path.join(season_dir, "schedule.csv")
+    if not os.path.exists(schedule_path):
+        write_rows(schedule_path, ["Race", "Name"],
+                   [{"Race": rnd, "Name": name} for rnd, name in source.schedule(season)])
+
+    checkpoint = Checkpoint(season, data_dir)
+    rounds = range(1, latest_round + 1)
+    # standings are extended from their last round unless results before it are about to be (re)written
+    standings_round, _ = last_standings(season_dir)
+    incremental = all(rnd > standings_round for rnd in checkpoint.missing("results", rounds))
+    with ThreadPoolExecutor(max_workers=len(STEPS)) as pool:
+        futures = {step: pool.submit(_run_step, step, season, rounds, source, checkpoint, data_dir) for step in STEPS}
+        errors = {step: future.result() for step, future in futures.items()}
+
+    add_standings(season, data_dir, incremental)
+    return {step: error for step, error in errors.items() if error is not None}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest a season's missing rounds into data/<season>.")
+    parser.add_argument("season", type=int)
+    parser.add_argument("latest_round", type=int)
+    parser.add_argument("--fixture", help="replay a recorded season folder instead of FastF1 (offline)")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--cache", default=CACHE_DIR, help="FastF1 cache folder")
+    args = parser.parse_args()
+
+    source = FixtureSource(args.fixture) if args.fixture else FastF1Source(cache_dir=args.cache)
+    ingest(args.season, args.latest_round, source, args.data_dir)
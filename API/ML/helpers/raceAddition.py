@@ -1,15 +1,11 @@
-from fileWriter import add_race
-from pitstops import add_pitstops
-from rain import add_rain
-from WCCStandings import add_standings
+from ingest import CACHE_DIR, ingest
+from sources import FastF1Source
 SEASON = 2025
 LATEST_ROUND = 14
 
 def main():
-    add_race(SEASON,LATEST_ROUND)
-    add_pitstops(SEASON)
-    add_rain(SEASON)
-    add_standings(SEASON)
+    # only rounds missing from data/<SEASON> are downloaded; results, rain and pitstops run concurrently
+    ingest(SEASON, LATEST_ROUND, FastF1Source(cache_dir=CACHE_DIR))
 
 
 if __name__ == "__main__":
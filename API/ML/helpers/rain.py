@@ -1,48 +1,41 @@
-import fastf1
-import os, csv
+import os
+from fileWriter import merge_rounds, read_rows
+from sources import DATA_DIR, FastF1Source, fetch_rounds
 
-def main():
-    for season in range(2025,2026):
-        with open(f"../data/{season}/rain.csv", "w") as file:
-            writer = csv.DictWriter(file, fieldnames=["Round","Race","Rain"])
-            writer.writeheader()
-        rounds = 1
-        while True:
-            try:
-                session = fastf1.get_session(season, rounds, "R")
-                session.load()
-
-                rained = session.weather_data["Rainfall"].any()
-
-                with open(f"../data/{season}/rain.csv", "a") as file:
-                    writer = csv.DictWriter(file, fieldnames=["Round","Race","Rain"])
-                    writer.writerow({"Round": rounds, "Race": session.event["EventName"], "Rain" : rained})
-                print(f"Saved round {rounds} of {season}")
-                rounds += 1
-
-            except Exception:
-                break
+RAIN_FIELDS = ["Round", "Race", "Rain"]
 
-def add_rain(season):
-    with open(f"../data/{season}/rain.csv", "w") as file:
-        writer = csv.DictWriter(file, fieldnames=["Round","Race","Rain"])
-        writer.writeheader()
-    rounds = 1
-    while True:
-        try:
-            session = fastf1.get_session(season, rounds, "R")
-            session.load()
+# sessions loaded at once; each only holds its weather data, so this is bound by the network
+RAIN_WORKERS = int(os.environ.get("F1_RAIN_WORKERS", 4))
 
-            rained = session.weather_data["Rainfall"].any()
-
-            with open(f"../data/{season}/rain.csv", "a") as file:
-                writer = csv.DictWriter(file, fieldnames=["Round","Race","Rain"])
-                writer.writerow({"Round": rounds, "Race": session.event["EventName"], "Rain" : rained})
-            print(f"Saved round {rounds} of {season}")
-            rounds += 1
-
-        except Exception:
-            break
+def main():
+    for season in range(2025,2026):
+        add_rain(season)
+
+def iter_rain(season, rounds, source, workers=RAIN_WORKERS):
+    # rain.csv rows of the given rounds, loaded in parallel and yielded in round order;
+    # raises at the first round the source can't load, after every round before it was yielded
+    for rnd, (name, rained) in fetch_rounds(source.rainfall, season, rounds, workers):
+        yield {"Round": rnd, "Race": name, "Rain": rained}
+
+def add_rain(season, latest_round=None, source=None, data_dir=DATA_DIR):
+    # add the scheduled rounds missing from rain.csv, up to latest_round (default: the whole schedule)
+    season_dir = os.path.join(data_dir, str(season))
+    path = os.path.join(season_dir, "rain.csv")
+    done = {int(row["Round"]) for row in read_rows(path)}
+    rounds = [int(row["Race"]) for row in read_rows(os.path.join(season_dir, "schedule.csv"))]
+    missing = [rnd for rnd in rounds if rnd not in done and (latest_round is None or rnd <= latest_round)]
+    if not missing:
+        return
+
+    rows = []
+    try:
+        for row in iter_rain(season, missing, source or FastF1Source()):
+            rows.append(row)
+            print(f"Saved round {row['Round']} of {season}")
+    except Exception:
+        pass  # rounds that haven't been raced yet
+    if rows:
+        merge_rounds(path, RAIN_FIELDS, rows)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,193 @@
+import csv
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data"))
+
+# Mapping constructorName → TeamName (as used in your original dataset)
+CONSTRUCTOR_TO_TEAMNAME = {
+    "McLaren": "McLaren",
+    "Red Bull": "Red Bull Racing",
+    "Ferrari": "Ferrari",
+    "Mercedes": "Mercedes",
+    "Williams": "Williams",
+    "RB F1 Team": "Racing Bulls",
+    "Haas F1 Team": "Haas F1 Team",
+    "Sauber": "Kick Sauber",
+    "Aston Martin": "Aston Martin",
+    "Alpine F1 Team": "Alpine"
+}
+
+
+class NoResponse(ValueError):
+    """Ergast has nothing for this request and round, or nothing was recorded for it."""
+
+
+def no_pitstops():
+    # what a source returns for a race that was run without any pit stop data (e.g. 2021 Belgian GP),
+    # as opposed to raising for a round that hasn't been raced yet
+    return pd.DataFrame({"Team": pd.Series(dtype=str), "AveragePitStop": pd.Series(dtype=float)})
+
+
+def fetch_rounds(fetch, season, rounds, workers):
+    # (round, fetch(season, round)) for the given rounds, requested in parallel and yielded in round order;
+    # raises at the first round that fails, after every round before it was yielded
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = [pool.submit(fetch, season, rnd) for rnd in rounds]
+        for rnd, future in zip(rounds, futures):
+            yield rnd, future.result()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def team_pitstop_averages(df_pit, df_results):
+    # average pit stop per team as (Team, AveragePitStop) rows, fastest first, from the raw Ergast frames
+    df_pit = df_pit.copy()
+
+    # Ensure duration is numeric, then convert from ns to seconds
+    df_pit['duration'] = pd.to_numeric(df_pit['duration'], errors='coerce') / 1e9
+    df_pit = df_pit.dropna(subset=['duration'])
+
+    # Map drivers to teams through the race results
+    driver_to_constructor = dict(zip(df_results['driverId'], df_results['constructorName']))
+
+    # Map constructorName to original dataset's TeamName
+    driver_to_teamname = {driver: CONSTRUCTOR_TO_TEAMNAME.get(constructor, constructor)
+                          for driver, constructor in driver_to_constructor.items()}
+    df_pit['team'] = df_pit['driverId'].map(driver_to_teamname)
+
+    # Group by team and calculate average pit stop in seconds
+    team_avg = df_pit.groupby('team')['duration'].mean().round(2).reset_index()
+    team_avg['duration'] = team_avg['duration'] / 10
+    team_avg.columns = ['Team', 'AveragePitStop']
+    return team_avg.sort_values(by='AveragePitStop', ascending=True)
+
+
+def ergast_pitstops(responses, season, rnd):
+    # team averages of a round; raises until the race has results, empty once it has results but no pit stops
+    results = responses.get("race_results", season, rnd)
+    try:
+        stops = responses.get("pit_stops", season, rnd)
+    except NoResponse:
+        return no_pitstops()
+    return team_pitstop_averages(stops, results)
+
+
+class ErgastResponses:
+    """Raw Ergast responses of one (request, season, round), kept on disk as pickled frames.
+
+    A round is only stored once Ergast has data for it, so a race that hasn't happened yet is asked again
+    next time. Without an ergast client it only replays what was recorded, which is how pit stops are
+    tested offline.
+    """
+
+    def __init__(self, cache_dir, ergast=None):
+        self.cache_dir = cache_dir
+        self.ergast = ergast
+
+    def get(self, request, season, rnd):
+        path = os.path.join(self.cache_dir, str(season), f"{rnd:02d} {request}.pkl") if self.cache_dir else None
+        if path and os.path.exists(path):
+            return pd.read_pickle(path)
+        if self.ergast is None:
+            raise NoResponse(f"No recorded {request} response for round {rnd} of {season}")
+
+        content = getattr(self.ergast, f"get_{request}")(season=season, round=rnd).content
+        if not content:
+            raise NoResponse(f"No {request} for round {rnd} of {season} yet")
+        frame = pd.concat(content, ignore_index=True)
+        if path:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            frame.to_pickle(path + ".tmp")
+            os.replace(path + ".tmp", path)
+        return frame
+
+
+class FastF1Source:
+    """Live data from FastF1 and Ergast. Downloaded sessions and Ergast responses are kept in cache_dir, so re-runs stay local."""
+
+    def __init__(self, cache_dir=None):
+        import fastf1
+        from fastf1.ergast import Ergast
+
+        self.fastf1 = fastf1
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            fastf1.Cache.enable_cache(cache_dir)
+        self.ergast = Ergast(result_type='pandas', auto_cast=True)
+        self.responses = ErgastResponses(os.path.join(cache_dir, "ergast") if cache_dir else None, self.ergast)
+
+    def schedule(self, season):
+        # (round, event name) of every race weekend
+        events = self.fastf1.get_event_schedule(season, include_testing=False)
+        return [(int(rnd), name) for rnd, name in zip(events["RoundNumber"], events["EventName"])]
+
+    def race_results(self, season, rnd):
+        # (event name, results DataFrame) of the race
+        session = self.fastf1.get_session(season, rnd, "R")
+        session.load()
+        return session.event["EventName"], session.results
+
+    def rainfall(self, season, rnd):
+        # (event name, whether it rained at any point of the race); only the weather data is loaded,
+        # not the laps, telemetry and race control messages a full load pulls in
+        session = self.fastf1.get_session(season, rnd, "R")
+        session.load(laps=False, telemetry=False, weather=True, messages=False)
+        return session.event["EventName"], session.weather_data["Rainfall"].any()
+
+    def pitstops(self, season, rnd):
+        return ergast_pitstops(self.responses, season, rnd)
+
+
+class RecordedErgastSource:
+    """Pit stops from the Ergast responses an earlier FastF1Source run recorded in cache_dir, without the network."""
+
+    def __init__(self, cache_dir):
+        self.responses = ErgastResponses(os.path.join(cache_dir, "ergast"))
+
+    def pitstops(self, season, rnd):
+        return ergast_pitstops(self.responses, season, rnd)
+
+
+class FixtureSource:
+    """Replays a recorded season folder (the files this pipeline writes) instead of calling the network.
+
+    Used to run and check ingestion offline: point it at e.g. data/2024 and ingest into an empty folder.
+    """
+
+    def __init__(self, fixture_dir):
+        self.fixture_dir = fixture_dir
+        with open(os.path.join(fixture_dir, "schedule.csv"), "r") as file:
+            self.names = {int(row["Race"]): row["Name"] for row in csv.DictReader(file)}
+
+    def _name(self, rnd):
+        try:
+            return self.names[rnd]
+        except KeyError:
+            raise ValueError(f"Round {rnd} is not in the fixture schedule") from None
+
+    def schedule(self, season):
+        return sorted(self.names.items())
+
+    def race_results(self, season, rnd):
+        name = self._name(rnd)
+        return name, pd.read_csv(os.path.join(self.fixture_dir, f"{name} R.csv"), dtype=str, keep_default_na=False)
+
+    def rainfall(self, season, rnd):
+        with open(os.path.join(self.fixture_dir, "rain.csv"), "r") as file:
+            for row in csv.DictReader(file):
+                if int(row["Round"]) == rnd:
+                    return row["Race"], row["Rain"] == "True"
+        raise ValueError(f"No rain data for round {rnd} in the fixture")
+
+    def pitstops(self, season, rnd):
+        df = pd.read_csv(os.path.join(self.fixture_dir, "pitstops.csv"), float_precision="round_trip")
+        team_avg = df[df["Round"] == rnd][["Team", "AveragePitStop"]]
+        if team_avg.empty:
+            if not os.path.exists(os.path.join(self.fixture_dir, f"{self._name(rnd)} R.csv")):
+                raise ValueError(f"No pit stops for round {rnd} in the fixture")
+            return no_pitstops()  # raced, but no pit stops were recorded
+        return team_avg
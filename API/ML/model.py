@@ -11,6 +11,21 @@ from sklearn.metrics import r2_score, mean_squared_error
 import joblib
 import glob
 
+try:
+    from .store import get_store
+    from .teams import constructor_id
+    from .tracks import track_index
+    from .careers import career_table, luck_factor
+except ImportError:  # run as a script from ML/ (training)
+    from store import get_store
+    from teams import constructor_id
+    from tracks import track_index
+    from careers import career_table, luck_factor
+
+# Bump whenever build_quali_vector / build_winrate_feature_vector change what they produce,
+# so precomputed feature files and cached training rows are rebuilt
+FEATURE_VERSION = 4
+
 def shift_recency_positions(recency_positions, n_ahead, Avg):
     # recency_positions = [Past1, Past2, Past3] (most recent first)
     # Shift the positions so that for each step ahead,
@@ -24,41 +39,177 @@ def shift_recency_positions(recency_positions, n_ahead, Avg):
     return shifted
 
 def is_team_equivalent(current_team, historical_team):
-    TEAM_NAME_ALIASES = {
-    "Aston Martin": ["Aston Martin", "Racing Point"],
-    "Racing Bulls": ["AlphaTauri", "Racing Bulls", "RB"],
-    "RB": ["AlphaTauri", "RB"],
-    "AlphaTauri": ["AlphaTauri",],
-    "Kick Sauber": ["Kick Sauber", "Alfa Romeo Racing", "Alfa Romeo"],
-    "Alfa Romeo": ["Alfa Romeo Racing", "Alfa Romeo"],
-    "Alfa Romeo Racing": ["Alfa Romeo Racing"],
-    "Mercedes": ["Mercedes"],
-    "Ferrari": ["Ferrari"],
-    "McLaren": ["McLaren"],
-    "Red Bull Racing": ["Red Bull", "Red Bull Racing"],
-    "Haas F1 Team": ["Haas", "Haas F1 Team"],
-    "Williams": ["Williams"],
-    "Alpine": ["Alpine", "Renault"],
-    "Renault": ["Renault"],
-    }
-    for canonical, aliases in TEAM_NAME_ALIASES.items():
-        if current_team == canonical and historical_team in aliases:
-            return True
-    return current_team == historical_team
+    # same constructor, following renames (Racing Point -> Aston Martin, AlphaTauri -> RB -> Racing Bulls, ...)
+    return constructor_id(current_team) == constructor_id(historical_team)
+
 
 def get_round_from_race_name(season, race_name):
-    import csv, os
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    schedule_path = os.path.join(base_dir, "data", str(season), "schedule.csv")
-    
-    with open(schedule_path, "r") as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            if row["Name"].strip().lower() == race_name.strip().lower():
-                return int(row["Race"])
-    return None  # if race name not found
-
-def build_winrate_feature_vector(imp_driver, imp_team, imp_season, imp_track, imp_latest_round) -> dict:
+    return get_store().season(season).schedule.find_round(race_name)  # None if race name not found
+
+class GridContext:
+    # Everything that doesn't depend on the driver for one (season, latest round, race) prediction.
+    # Built once per grid and shared by every driver's feature vector; team-level values are memoized per team.
+
+    def __init__(self, season, latest_round, race_name, store=None, shared=None):
+        self.store = store or get_store()
+        self.season = season
+        self.latest_round = latest_round
+        self.track = race_name
+
+        self.data = self.store.season(season)
+        self.round = get_round_from_race_name(season=season, race_name=race_name)
+        self.past_races = self.data.race_names(latest_round=latest_round)
+        self.before_races = self.data.race_names(before_round=latest_round)
+        self.past_seasons = [self.store.season(s) for s in range(2020, season)]
+        # everything about this track from previous seasons, shared by every grid predicted for it
+        self.track_index = track_index(race_name, season, self.past_seasons)
+        # career totals of every driver over the previous seasons, per constructor they drove for
+        self.careers = career_table(self.past_seasons)
+        self._team_rows = {}
+        self._team_values = {}
+        # values that don't depend on the track, shared by the grids of every race predicted from the same data
+        self.shared = {} if shared is None else shared
+
+    def team_rows(self, race, team):
+        # rows of a race whose team is (or was) the given team, in file order
+        key = (race.season, race.name, team)
+        rows = self._team_rows.get(key)
+        if rows is None:
+            rows = np.flatnonzero(race.team_id == constructor_id(team)).tolist()
+            self._team_rows[key] = rows
+        return rows
+
+    def team_value(self, name, team, compute):
+        # memoize a team-level feature so teammates share one computation
+        key = (name, team)
+        if key not in self._team_values:
+            self._team_values[key] = compute(self, team)
+        return self._team_values[key]
+
+    def season_value(self, name, key, compute, *args):
+        # memoize a value that only depends on the season and latest round, so predicting several races
+        # ahead (every grid built with the same shared dict) computes it once instead of once per race
+        key = (self.season, self.latest_round, name, key)
+        if key not in self.shared:
+            self.shared[key] = compute(*args)
+        return self.shared[key]
+
+# average of a driver's valid values ("position" / "grid") over the given races
+def driver_season_avg(ctx, race_names, driver, column):
+    total = 0
+    count = 0
+    for name in race_names:
+        race = ctx.data.race(name)
+        i = race.find(driver)
+        if i is None:
+            continue
+        value = getattr(race, column)[i]
+        if np.isnan(value):
+            continue  # skip non-finishers or invalid data
+        total += int(value)
+        count += 1
+    return total / count if count > 0 else 0
+
+# driver's values in the last 3 of the given races, most recent first, padded with None
+def driver_recency(ctx, race_names, driver, column):
+    positions = []
+    for name in reversed(race_names[-3:]):
+        try:
+            race = ctx.data.race(name)
+            i = race.find(driver)
+            if i is not None:
+                positions.append(int(getattr(race, column)[i]))
+        except Exception:
+            positions.append(None)
+
+    while len(positions) < 3:
+        positions.append(None)
+    return positions
+
+# (driver, teammate) value in a race, 0 when missing; raises ValueError on a non-classified row
+def teammate_values(ctx, race, team, driver, column):
+    values = getattr(race, column)
+    teammate = 0
+    drv = 0
+    for i in ctx.team_rows(race, team):
+        if race.driver[i] == driver:
+            drv = int(values[i])
+        else:
+            teammate = int(values[i])
+    return drv, teammate
+
+# average gap to teammate over the races before the latest round of this season
+def season_teammate_gap(ctx, team, driver, column):
+    gaps = 0
+    races = 0
+    for name in ctx.before_races:
+        drv, teammate = teammate_values(ctx, ctx.data.race(name), team, driver, column)
+        if teammate != 0 and drv != 0:
+            races += 1
+        if drv == 0:
+            continue
+        gaps += (teammate - drv)
+    return gaps / races if races > 0 else None
+
+# Team Scores.csv (Points, Placement) for the team after the latest round, None if not listed
+def constructor_standing(ctx, team):
+    return ctx.data.standings.at(ctx.latest_round, constructor_id(team))
+
+# average constructors placement of the team at this track in past seasons
+def past_car_used(ctx, team):
+    return ctx.track_index.car_used(constructor_id(team))
+
+# average pitstop time of the team this season and at this track in past seasons (under any of its names)
+def team_pitstops(ctx, team):
+    cid = constructor_id(team)
+    time = ctx.data.pitstop_totals.total(cid)
+    this_season = (time/ctx.latest_round) if ctx.latest_round > 0 else 0
+
+    return this_season, ctx.track_index.pitstops(cid)
+
+# average qualifying position of the team this season (stopping at the first non-classified row of a race)
+def team_curr_avg(ctx, team):
+    finish_sum = 0
+    race_count = 0
+    for round_name in ctx.past_races:
+        race = ctx.data.race(round_name)
+        for i in ctx.team_rows(race, team):
+            if np.isnan(race.grid[i]):
+                break  # skip non-finishers or invalid data
+            finish_sum += int(race.grid[i])
+            race_count += 1
+    return finish_sum / race_count if race_count > 0 else 0
+
+# average qualifying position of the team at this track in past seasons
+def team_past_avg(ctx, team):
+    return ctx.track_index.team_past_avg(constructor_id(team))
+
+# dry/wet ratio of the driver's average value over the rain.csv races of the given seasons
+def wet_weather_multiplier(seasons, driver, column):
+    wetRaces = 0
+    dryRaces = 0
+    avgWet = 0
+    avgDry = 0
+
+    for data in seasons:
+        for name, rained in zip(data.rain["Race"], data.rain["Rain"]):
+            race = data.race(name)
+            i = race.find(driver)
+            value = getattr(race, column)[i] if i is not None else np.nan
+            value = 0 if np.isnan(value) else int(value)
+            if rained:
+                wetRaces += 1
+                avgWet += value
+            else:
+                dryRaces += 1
+                avgDry += value
+
+    try:
+        return (avgDry/dryRaces)/(avgWet/wetRaces)
+    except Exception:
+        return 1
+
+def build_winrate_feature_vector(imp_driver, imp_team, imp_season, imp_track, imp_latest_round, ctx=None) -> dict:
     # Baseline Data
 
     TRACK = imp_track
@@ -94,557 +245,89 @@ def build_winrate_feature_vector(imp_driver, imp_team, imp_season, imp_track, im
         }
 
     #Load data for MDOEL
-    # Load average finish for driver this season
-    rounds = []
-    base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-    schedule_path = os.path.join(base_dir, "data", str(SEASON), f"schedule.csv")
-    with open(schedule_path, "r") as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            if int(row["Race"]) <= LATEST_ROUND:
-                rounds.append(row["Name"])
+    if ctx is None:
+        ctx = GridContext(SEASON, LATEST_ROUND, TRACK)
+    data = ctx.data
 
-    finish_sum = 0
-    race_count = 0
+    # Load average finish and average start for driver this season
+    carFeatures["Season Avg Finish"] = ctx.season_value("season avg", (DRIVER, "position"), driver_season_avg, ctx, ctx.past_races, DRIVER, "position")
+    carFeatures["Season Avg Start"] = ctx.season_value("season avg", (DRIVER, "grid"), driver_season_avg, ctx, ctx.past_races, DRIVER, "grid")
 
-    for round_name in rounds:
-        base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-        schedule_path = os.path.join(base_dir, "data", str(SEASON), f"{round_name} R.csv")
-        with open(schedule_path, "r") as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                if row["FullName"] == DRIVER:
-                    try:
-                        pos = int(float(row["Position"]))
-                        finish_sum += pos
-                        race_count += 1
-                    except Exception:
-                        break  # skip non-finishers or invalid data
-
-    carFeatures["Season Avg Finish"] = finish_sum / race_count if race_count > 0 else 0
     # Example: number of races ahead you want to predict (0 for current race)
-    round = get_round_from_race_name(season=SEASON, race_name=TRACK)
-    n_ahead = round - LATEST_ROUND -1
-
-        # Load average start for driver this season
-    rounds = []
-    base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-    schedule_path = os.path.join(base_dir, "data", str(SEASON), "schedule.csv")
-    with open(schedule_path, "r") as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            if int(row["Race"]) <= LATEST_ROUND:
-                rounds.append(row["Name"])
-
-    finish_sum = 0
-    race_count = 0
-
-    for round_name in rounds:
-        base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-        schedule_path = os.path.join(base_dir, "data", str(SEASON), f"{round_name} R.csv")
-        with open(schedule_path, "r") as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                if row["FullName"] == DRIVER:
-                    try:
-                        pos = int(float(row["GridPosition"]))
-                        finish_sum += pos
-                        race_count += 1
-                    except Exception:
-                        break  # skip non-finishers or invalid data
-
-    carFeatures["Season Avg Start"] = finish_sum / race_count if race_count > 0 else 0
-
-    # Load Recency bias for starting positions:
-    recency_positions = []
-    base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-    schedule_path = os.path.join(base_dir, "data", str(SEASON), "schedule.csv")
-    with open(schedule_path, "r") as file:
-        reader = csv.DictReader(file)
-        past_races = [row["Name"] for row in reader if int(row["Race"]) <= LATEST_ROUND]
-
-    last_races = past_races[-3:]  # last 3 races before the current round
-    last_races_reversed = list(reversed(last_races))  # most recent first
-
-    for race in last_races_reversed:
-        try:
-            race_path = os.path.join(base_dir, "data", str(SEASON), f"{race} R.csv")
-            with open(race_path, "r") as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    if row["FullName"] == DRIVER:
-                        pos = int(float(row["GridPosition"]))
-                        recency_positions.append(pos)
-                        break
-        except Exception:
-            recency_positions.append(None)
-
-    # Make sure we have exactly 3 elements (fill with None if less)
-    while len(recency_positions) < 3:
-        recency_positions.append(None)
-
-    # Shift recency positions for future races ahead
-    shifted_positions = shift_recency_positions(recency_positions, n_ahead, carFeatures["Season Avg Start"])
+    n_ahead = ctx.round - LATEST_ROUND -1
 
-    # Assign recency values (Past1 = most recent, Past2 = second most, etc.)
+    # Load Recency bias for starting positions and finishing positions
+    # Shift recency positions for future races ahead (Past1 = most recent, Past2 = second most, etc.)
+    shifted_positions = shift_recency_positions(ctx.season_value("recency", (DRIVER, "grid"), driver_recency, ctx, ctx.past_races, DRIVER, "grid"), n_ahead, carFeatures["Season Avg Start"])
     for i in range(3):
-        key = f"Past{i+1}"
-        carFeatures["Recency Start Bias"][key] = shifted_positions[i]
-
-    #Load past avg std dev from starting pos
-    placements = 0
-    races = 0
-    for season in range(2020,SEASON):
-        try:
-            base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-            schedule_path = os.path.join(base_dir, "data", str(season), f"{TRACK} R.csv")
-            if not os.path.exists(schedule_path):
-                continue
-            with open(schedule_path, "r") as file:
-                reader = csv.DictReader(file)
-                races += 1
-                for row in reader:
-                    if row["FullName"] == DRIVER:
-                        placements += int(float(row["Position"])) - int(float(row["GridPosition"]))
-        except Exception:
-            continue
-
-    driverFeatures["Driver Past Placements"]["Std Dev"] = placements/races if races > 0 and placements != 0 else None
-    #Load Past Starting Pos Avg
-    placements = 0
-    races = 0
-    for season in range(2020,SEASON):
-        try:
-            base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-            schedule_path = os.path.join(base_dir, "data", str(season), f"{TRACK} R.csv")
-            if not os.path.exists(schedule_path):
-                continue
-            with open(schedule_path, "r") as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    if row["FullName"] == DRIVER:
-                        placements += int(float(row["GridPosition"]))
-                        races += 1
-        except Exception:
-            continue
+        carFeatures["Recency Start Bias"][f"Past{i+1}"] = shifted_positions[i]
 
+    shifted_positions = shift_recency_positions(ctx.season_value("recency", (DRIVER, "position"), driver_recency, ctx, ctx.past_races, DRIVER, "position"), n_ahead, carFeatures["Season Avg Finish"])
+    for i in range(3):
+        carFeatures["Recency Finish Bias"][f"Past{i+1}"] = shifted_positions[i]
+
+    #Load past avg std dev from starting pos, Past Starting Pos Avg and Experience around the track
+    past = ctx.track_index.driver(DRIVER)
+    held = ctx.track_index.held
+    gained = past["gained"]
+    placements = past["start"]
+    races = past["starts"]
+    driverFeatures["Driver Past Placements"]["Std Dev"] = gained/held if held > 0 and gained != 0 else None
     driverFeatures["Driver Past Placements"]["Starting Pos"] = placements/races if races > 0 and placements != 0 else None
-    # Load Experiecne aroudn the track
     driverFeatures["Driver Past Placements"]["Experience"] = races if races > 0 else None
 
-    #Load current constructors points:
-    base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-    schedule_path = os.path.join(base_dir, "data", str(SEASON), "Team Scores.csv")
-    with open(schedule_path, "r") as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            if int(row["Race"]) == LATEST_ROUND and is_team_equivalent(TEAM, row["TeamName"]):
-                carFeatures["Team Constructors Points"] = row["Points"]
+    #Load current constructors points and placement for the team this season
+    points, placement = ctx.season_value("standing", TEAM, constructor_standing, ctx, TEAM)
+    carFeatures["Team Constructors Points"] = points
+    carFeatures["Team Constructors Championship Placement"] = placement
 
     #Load average Teammate Gap:
-    recency_positions = []
-    base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-    schedule_path = os.path.join(base_dir, "data", str(SEASON), "schedule.csv")
-    with open(schedule_path, "r") as file:
-        reader = csv.DictReader(file)
-        past_races = [row["Name"] for row in reader if int(row["Race"]) < LATEST_ROUND]
-
-    gaps = 0
-    races = 0
-    for race in past_races:
-        base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-        schedule_path = os.path.join(base_dir, "data", str(SEASON), f"{race} R.csv")
-        with open(schedule_path, "r") as file:
-            reader = csv.DictReader(file)
-            teammate = 0
-            driver = 0
-            for row in reader:
-                if is_team_equivalent(TEAM, row["TeamName"]):
-                    if row["FullName"] == DRIVER:
-                        driver = int(float(row["Position"]))
-                    else:
-                        teammate = int(float(row["Position"]))
-            if teammate != 0 and driver != 0:
-                races += 1
-            if driver == 0:
-                continue
-
-        gaps += (teammate - driver)
-
-    driverFeatures["Teammate Gap"] = gaps/races if races > 0 else None
-
-    # Example: number of races ahead you want to predict (0 for current race)
-    round = get_round_from_race_name(season=SEASON, race_name=TRACK)
-    n_ahead = round - LATEST_ROUND -1
-
-    # Load Recency bias for starting positions:
-    recency_positions = []
-    base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-    schedule_path = os.path.join(base_dir, "data", str(SEASON), "schedule.csv")
-    with open(schedule_path, "r") as file:
-        reader = csv.DictReader(file)
-        past_races = [row["Name"] for row in reader if int(row["Race"]) <= LATEST_ROUND]
-
-    last_races = past_races[-3:]  # last 3 races before the current round
-    last_races_reversed = list(reversed(last_races))  # most recent first
-
-    for race in last_races_reversed:
-        try:
-            race_path = os.path.join(base_dir, "data", str(SEASON), f"{race} R.csv")
-            with open(race_path, "r") as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    if row["FullName"] == DRIVER:
-                        pos = int(float(row["Position"]))
-                        recency_positions.append(pos)
-                        break
-        except Exception:
-            recency_positions.append(None)
-
-    # Make sure we have exactly 3 elements (fill with None if less)
-    while len(recency_positions) < 3:
-        recency_positions.append(None)
-
-    # Shift recency positions for future races ahead
-    shifted_positions = shift_recency_positions(recency_positions, n_ahead, carFeatures["Season Avg Finish"])
-
-    # Assign recency values (Past1 = most recent, Past2 = second most, etc.)
-    for i in range(3):
-        key = f"Past{i+1}"
-        carFeatures["Recency Finish Bias"][key] = shifted_positions[i]
-
-
-    #Load current consturctors placement for the team this season
-    base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-    schedule_path = os.path.join(base_dir, "data", str(SEASON), "Team Scores.csv")
-    with open(schedule_path, "r") as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            if int(row["Race"]) == LATEST_ROUND and is_team_equivalent(TEAM, row["TeamName"]):
-                carFeatures["Team Constructors Championship Placement"] = row["Placement"]
-
-
-    # Load Average Pitstop Time
-    # This Season
-
-    time = 0
-    base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-    schedule_path = os.path.join(base_dir, "data", str(SEASON), "pitstops.csv")
-    with open(schedule_path, "r") as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            if row["Team"] == TEAM:
-                time += float(row["AveragePitStop"])
-    teamFeatures["Average Pitstop Time"]["This Season"] = (time/LATEST_ROUND) if LATEST_ROUND > 0 else 0
-
-    # Past Seasons on set Track
-    total = 0
-    count = 0
-    for season in range(2020,SEASON):
-        round = None
-        base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-        schedule_path = os.path.join(base_dir, "data", str(season), "schedule.csv")
-        with open(schedule_path, "r") as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                if row["Name"] == TRACK:
-                    round = int(row["Race"])
-        if not round:
-            continue
-        base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-        schedule_path = os.path.join(base_dir, "data", str(season), "pitstops.csv")
-        with open(schedule_path, "r") as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                if int(row["Round"]) == round and row["Team"] == TEAM:
-                    count += 1
-                    total += float(row["AveragePitStop"])
-                    break
-
-    teamFeatures["Average Pitstop Time"]["Past on Track"] = (total / count) if count > 0 else 0
+    driverFeatures["Teammate Gap"] = ctx.season_value("teammate gap", (TEAM, DRIVER, "position"), season_teammate_gap, ctx, TEAM, DRIVER, "position")
 
+    # Load Average Pitstop Time (This Season, Past Seasons on set Track)
+    this_season, past_on_track = ctx.team_value("pitstops", TEAM, team_pitstops)
+    teamFeatures["Average Pitstop Time"]["This Season"] = this_season
+    teamFeatures["Average Pitstop Time"]["Past on Track"] = past_on_track
 
     # Load reliability (this season)
-    # Load DNF rate
-    base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-    schedule_path = os.path.join(base_dir, "data", str(SEASON), f"schedule.csv")
-    checks = []
-    with open(schedule_path,"r") as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            if row["Name"] != TRACK:
-                checks.append(row["Name"])
+    # Load DNF rate and DNS rate
+    checks = [name for name in data.schedule.names if name != TRACK]
     dnfs = 0
-    for c in checks:
-        base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-        schedule_path = os.path.join(base_dir, "data", str(SEASON), f"{c} R.csv")
-        if not os.path.exists(schedule_path):
-            continue
-        with open(schedule_path, "r") as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                if row["FullName"] == DRIVER:
-                    if row["Status"] == "Retired":
-                        dnfs += 1
-    teamFeatures["Reliability"]["DNF rate"] = dnfs/len(checks) if len(checks) > 0 else 0
-
-    #Load DNS rate
-    base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-    schedule_path = os.path.join(base_dir, "data", str(SEASON), f"schedule.csv")
-    checks = []
-    with open(schedule_path,"r") as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            if row["Name"] != TRACK:
-                checks.append(row["Name"])
     dns = 0
     for c in checks:
-        base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-        schedule_path = os.path.join(base_dir, "data", str(SEASON), f"{c} R.csv")
-        if not os.path.exists(schedule_path):
+        if not data.has_race(c):
             continue
-        with open(schedule_path, "r") as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                if row["FullName"] == DRIVER:
-                    if row["Status"] == "Did not start":
-                        dns += 1
+        race = data.race(c)
+        i = race.find(DRIVER)
+        if i is None:
+            continue
+        dnfs += race.status[i] == "Retired"
+        dns += race.status[i] == "Did not start"
+    teamFeatures["Reliability"]["DNF rate"] = dnfs/len(checks) if len(checks) > 0 else 0
     teamFeatures["Reliability"]["DNS rate"] = dns/len(checks) if len(checks) > 0 else 0
 
-
     #Driver Past Placements on track
     #Load Average Placements
-
-    placements = 0
-    races = 0
-
-    for season in range(2020,SEASON):
-        try:
-            base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-            schedule_path = os.path.join(base_dir, "data", str(season), f"{TRACK} R.csv")  
-            if not os.path.exists(schedule_path):
-                continue
-            with open(schedule_path, "r") as file:
-                reader = csv.DictReader(file)
-                races += 1
-                for row in reader:
-                    if row["FullName"] == DRIVER:
-                        placements += int(float(row["Position"]))
-        except Exception:
-            continue
-
-    driverFeatures["Driver Past Placements"]["Avg"] = placements/races if races > 0 and placements != 0 else None
+    placements = past["finish"]
+    driverFeatures["Driver Past Placements"]["Avg"] = placements/held if held > 0 and placements != 0 else None
 
     #Load Car used/Average Constructors Championship
-    constructors = 0
-    races = 0
-    for season in range(2020,SEASON):
-        round = None
-        base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-        schedule_path = os.path.join(base_dir, "data", str(season), f"schedule.csv")
-        with open(schedule_path, "r") as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                if row["Name"] == TRACK:
-                    round = int(row["Race"])
-                    races += 1
-        base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-        schedule_path = os.path.join(base_dir, "data", str(season), f"Team Scores.csv")
-        with open(schedule_path, "r") as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                if int(row["Race"]) == round:
-                    if is_team_equivalent(TEAM, row["TeamName"]):
-                        constructors += int(row["Placement"])
-                        break
-
-    driverFeatures["Driver Past Placements"]["Car Used"] = constructors/races if races > 0 else 0
+    driverFeatures["Driver Past Placements"]["Car Used"] = ctx.team_value("car used", TEAM, past_car_used)
 
     #Load gap to teammate on track
-    gaps = 0
-    races = 0
-
-    for season in range(2020, SEASON):
-        try:
-            base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-            schedule_path = os.path.join(base_dir, "data", str(season), f"{TRACK} R.csv")
-            if not os.path.exists(schedule_path):
-                continue
-            with open(schedule_path, "r") as file:
-                reader = csv.DictReader(file)
-                teammate = 0
-                driver = 0
-                for row in reader:
-                    if is_team_equivalent(TEAM, row["TeamName"]):
-                        if row["FullName"] == DRIVER:
-                            driver = int(float(row["Position"]))
-                        else:
-                            teammate = int(float(row["Position"]))
-                if driver != 0 and teammate != 0:
-                    races += 1
-
-                if driver == 0:
-                    continue
-            gaps += (teammate - driver)
-        except Exception:
-            continue
-
-    driverFeatures["Driver Past Placements"]["Teammate Gap"] = gaps/races if races > 0 else None
+    driverFeatures["Driver Past Placements"]["Teammate Gap"] = ctx.track_index.race_teammate_gap(DRIVER, constructor_id(TEAM))
 
     #Load Wet Weather Multiplier
-
     #Past Seasons
-    wetRaces = 0
-    dryRaces = 0
-    avgWet = 0
-    avgDry = 0
-
-    for season in range(2020, SEASON):
-        base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-        schedule_path = os.path.join(base_dir, "data", str(season), "rain.csv")
-        with open(schedule_path, "r") as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                if row["Rain"] == "True":
-                    wetRaces += 1
-                    base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-                    schedule_path = os.path.join(base_dir, "data", str(season), f"{row['Race']} R.csv")
-                    with open(schedule_path, "r") as f:
-                        r = csv.DictReader(f)
-                        for driver in r:
-                            if driver["FullName"] == DRIVER:
-                                try:
-                                    avgWet += int(float(driver["Position"]))
-                                    break
-                                except Exception:
-                                    break
-                else:
-                    dryRaces += 1
-                    base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-                    schedule_path = os.path.join(base_dir, "data", str(season), f"{row['Race']} R.csv")
-                    with open(schedule_path, "r") as f:
-                        r = csv.DictReader(f)
-                        for driver in r:
-                            if driver["FullName"] == DRIVER:
-                                try:
-                                    avgDry += int(float(driver["Position"]))
-                                    break
-                                except Exception:
-                                    break
-    try:
-        multiplier = (avgDry/dryRaces)/(avgWet/wetRaces)
-    except Exception:
-        multiplier = 1
-
-    driverFeatures["Wet Weather Multiplier"]["Prev Seasons"] = multiplier
-
+    driverFeatures["Wet Weather Multiplier"]["Prev Seasons"] = ctx.season_value("wet past", (DRIVER, "position"), wet_weather_multiplier, ctx.past_seasons, DRIVER, "position")
     #This Season
-    wetRaces = 0
-    dryRaces = 0
-    avgWet = 0
-    avgDry = 0
-
-    base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-    schedule_path = os.path.join(base_dir, "data", str(SEASON), "rain.csv")
-    with open(schedule_path, "r") as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            if row["Rain"] == "True":
-                wetRaces += 1
-                base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-                schedule_path = os.path.join(base_dir, "data", str(SEASON), f"{row['Race']} R.csv")
-                with open(schedule_path, "r") as f:
-                    r = csv.DictReader(f)
-                    for driver in r:
-                        if driver["FullName"] == DRIVER:
-                            try:
-                                avgWet += int(float(driver["Position"]))
-                                break
-                            except Exception:
-                                break
-            else:
-                dryRaces += 1
-                base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-                schedule_path = os.path.join(base_dir, "data", str(SEASON), f"{row['Race']} R.csv")
-                with open(schedule_path, "r") as f:
-                    r = csv.DictReader(f)
-                    for driver in r:
-                        if driver["FullName"] == DRIVER:
-                            try:
-                                avgDry += int(float(driver["Position"]))
-                                break
-                            except Exception:
-                                break
-
-    try:
-        multiplier = (avgDry/dryRaces)/(avgWet/wetRaces)
-    except Exception:
-        multiplier = 1
+    driverFeatures["Wet Weather Multiplier"]["This Season"] = ctx.season_value("wet season", (DRIVER, "position"), wet_weather_multiplier, [data], DRIVER, "position")
 
-    driverFeatures["Wet Weather Multiplier"]["This Season"] = multiplier
-
-    #Calculate Luck Factor
-
-    # Setup
-    avg_luck_total = 0
-    avg_gain_total = 0
-    positions = []
-    luck_races = 0
-    gain_races = 0
-
-    for season in range(2020, SEASON):
-        base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-        schedule_path = os.path.join(base_dir, "data", str(season), "* R.csv")
-        race_paths = sorted(glob.glob(schedule_path))
-        for path in race_paths:
-            try:
-                with open(path, "r") as file:
-                    reader = list(csv.DictReader(file))
-
-                    driver_row = None
-                    teammate_row = None
-
-                    for row in reader:
-                        if is_team_equivalent(TEAM, row["TeamName"]):
-                            if row["FullName"] == DRIVER:
-                                driver_row = row
-                            else:
-                                teammate_row = row
-
-                    if driver_row:
-                        # Standard deviation base
-                        try:
-                            finish_pos = int(float(driver_row["Position"]))
-                            positions.append(finish_pos)
-                        except:
-                            pass
-
-                        # Gain from grid
-                        try:
-                            start = int(float(driver_row["GridPosition"]))
-                            finish = int(float(driver_row["Position"]))
-                            avg_gain_total += (start - finish)
-                            gain_races += 1
-                        except:
-                            pass
-
-                    if driver_row and teammate_row:
-                        try:
-                            drv_finish = int(float(driver_row["Position"]))
-                            tmt_finish = int(float(teammate_row["Position"]))
-                            avg_luck_total += (tmt_finish - drv_finish)
-                            luck_races += 1
-                        except:
-                            pass
-
-            except Exception as e:
-                print(f"[WARN] Skipping {path}: {e}")
-                continue
-
-    # Store values
-    carFeatures["Luck Factor"]["Avg Luck"] = avg_luck_total / luck_races if luck_races else 0
-    carFeatures["Luck Factor"]["Avg Gain"] = avg_gain_total / gain_races if gain_races else 0
-    carFeatures["Luck Factor"]["Std Dev"] = np.std(positions) if len(positions) > 1 else 0
+    #Calculate Luck Factor over the driver's past seasons with this team
+    avg_gain, avg_luck, std = luck_factor(ctx.careers, DRIVER, constructor_id(TEAM))
+    carFeatures["Luck Factor"]["Avg Luck"] = avg_luck
+    carFeatures["Luck Factor"]["Avg Gain"] = avg_gain
+    carFeatures["Luck Factor"]["Std Dev"] = std
 
 
     return winrate
@@ -665,64 +348,50 @@ def flatten_features(winrate):
     return flat
 # return mapping of all drivers and teams that they drive for
 def driversANDteams(season, latestRound):
-    drivers = []
-    teams = {}
-    race = None
-    base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-    schedule_path = os.path.join(base_dir, "data", str(season), "schedule.csv")
-    with open(schedule_path, "r") as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            if int(row["Race"]) == latestRound:
-                race = row["Name"]
+    data = get_store().season(season)
+    race = data.schedule.name_of(latestRound)
     if not race:
         return
-    race_path = os.path.join(base_dir, "data", str(season), f"{race} R.csv")
-    with open(race_path, "r") as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            drivers.append(row["FullName"])
-            teams[row["FullName"]] = row["TeamName"]
+    results = data.race(race)
+    drivers = results.driver.tolist()
+    teams = dict(zip(results.driver, results.team))
 
     return (drivers,teams)
 
 #return resulting score of driver at set reason and set race
 def get_race_results(driver, season, race):
-   
+    data = get_store().season(season)
+    if not data.has_race(race):
+        print(f"[TRAIN] Missing file: {season} {race}")
+        return None
+    results = data.race(race)
+    i = results.find(driver)
+    if i is None:
+        return None
     try:
-        base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-        path = os.path.join(base_dir, "data", str(season), f"{race} R.csv")
-        with open(path, "r") as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                if row["FullName"] == driver:
-                    try:
-                        return int(float(row["Position"]))
-                    except ValueError:
-                        print(f"[TRAIN] Invalid position value '{row['Position']}' for {driver} at {season} {race}")
-                        return None
-    except FileNotFoundError:
-        print(f"[TRAIN] Missing file: {path}")
+        return int(results.position[i])
+    except ValueError:
+        print(f"[TRAIN] Invalid position value '{results.position[i]}' for {driver} at {season} {race}")
+        return None
 
 #return resulting score of driver at set reason and set race
 def get_quali_results(driver, season, race):
-    base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-    path = os.path.join(base_dir, "data", str(season), f"{race} R.csv")
+    data = get_store().season(season)
+    if not data.has_race(race):
+        print(f"[TRAIN] Missing file: {season} {race}")
+        return None
+    results = data.race(race)
+    i = results.find(driver)
+    if i is None:
+        return None
     try:
-        with open(path, "r") as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                if row["FullName"] == driver:
-                    try:
-                        return int(float(row["GridPosition"]))
-                    except ValueError:
-                        print(f"[TRAIN] Invalid position value '{row['GridPosition']}' for {driver} at {season} {race}")
-                        return None
-    except FileNotFoundError:
-        print(f"[TRAIN] Missing file: {path}")
-
-
-def build_quali_vector(imp_driver, imp_team, imp_season, imp_track, imp_latest_round) -> dict:
+        return int(results.grid[i])
+    except ValueError:
+        print(f"[TRAIN] Invalid position value '{results.grid[i]}' for {driver} at {season} {race}")
+        return None
+
+
+def build_quali_vector(imp_driver, imp_team, imp_season, imp_track, imp_latest_round, ctx=None) -> dict:
     # Baseline Data
 
     TRACK = imp_track
@@ -751,372 +420,86 @@ def build_quali_vector(imp_driver, imp_team, imp_season, imp_track, imp_latest_r
         "Driver": driverFeatures
         }
     # Load Quali Model
+    if ctx is None:
+        ctx = GridContext(SEASON, LATEST_ROUND, TRACK)
+
+    #Load current constructors points and placement for the team this season
+    points, placement = ctx.season_value("standing", TEAM, constructor_standing, ctx, TEAM)
+    carFeatures["Team Constructors Points"] = points
+    carFeatures["Team Constructors Championship Placement"] = placement
 
-    #Load current constructors points:
-    base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-    path = os.path.join(base_dir, "data", str(SEASON), "Team Scores.csv")
-    with open(path, "r") as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            if int(row["Race"]) == LATEST_ROUND and is_team_equivalent(TEAM, row["TeamName"]):
-                carFeatures["Team Constructors Points"] = row["Points"]
-    # Load Teammate Gap
     #Load average Teammate Gap:
-    recency_positions = []
-    base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-    path = os.path.join(base_dir, "data", str(SEASON), "schedule.csv")
-    with open(path, "r") as file:
-        reader = csv.DictReader(file)
-        past_races = [row["Name"] for row in reader if int(row["Race"]) < LATEST_ROUND]
+    driverFeatures["Teammate Gap"] = ctx.season_value("teammate gap", (TEAM, DRIVER, "grid"), season_teammate_gap, ctx, TEAM, DRIVER, "grid")
 
-    gaps = 0
-    races = 0
-    for race in past_races:
-        base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-        path = os.path.join(base_dir, "data", str(SEASON), f"{race} R.csv")
-        with open(path, "r") as file:
-            reader = csv.DictReader(file)
-            teammate = 0
-            driver = 0
-            for row in reader:
-                if is_team_equivalent(TEAM, row["TeamName"]):
-                    if row["FullName"] == DRIVER:
-                        driver = int(float(row["GridPosition"]))
-                    else:
-                        teammate = int(float(row["GridPosition"]))
-            if teammate != 0 and driver != 0:
-                races += 1
-            if driver == 0:
-                continue
-
-        gaps += (teammate - driver)
-
-    driverFeatures["Teammate Gap"] = gaps/races if races > 0 else None
     # Load Recency Bias (last 3 races or as many as available)
     # Example: number of races ahead you want to predict (0 for current race)
-    rnd = get_round_from_race_name(season=SEASON, race_name=TRACK)
-    n_ahead = rnd - LATEST_ROUND -1
-    # Load average finish for driver this season
-    rounds = []
-    base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-    path = os.path.join(base_dir, "data", str(SEASON), f"schedule.csv")
-    with open(path, "r") as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            if int(row["Race"]) <= LATEST_ROUND:
-                rounds.append(row["Name"])
-
-    finish_sum = 0
-    race_count = 0
-
-    for round_name in rounds:
-        base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-        path = os.path.join(base_dir, "data", str(SEASON), f"{round_name} R.csv")
-        with open(path, "r") as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                if row["FullName"] == DRIVER:
-                    try:
-                        pos = int(float(row["GridPosition"]))
-                        finish_sum += pos
-                        race_count += 1
-                    except Exception:
-                        break  # skip non-finishers or invalid data
-
-    carFeatures["Season Avg Pos"] = finish_sum / race_count if race_count > 0 else 0
-    # Load Recency bias for starting positions:
-    recency_positions = []
-    base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-    schedule_path = os.path.join(base_dir, "data", str(SEASON), "schedule.csv")
-    with open(schedule_path, "r") as file:
-        reader = csv.DictReader(file)
-        past_races = [row["Name"] for row in reader if int(row["Race"]) <= LATEST_ROUND]
-
-    last_races = past_races[-3:]  # last 3 races before the current round
-    last_races_reversed = list(reversed(last_races))  # most recent first
-
-    for race in last_races_reversed:
-        try:
-            race_path = os.path.join(base_dir, "data", str(SEASON), f"{race} R.csv")
-            with open(race_path, "r") as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    if row["FullName"] == DRIVER:
-                        pos = int(float(row["GridPosition"]))
-                        recency_positions.append(pos)
-                        break
-        except Exception:
-            recency_positions.append(None)
-
-    # Make sure we have exactly 3 elements (fill with None if less)
-    while len(recency_positions) < 3:
-        recency_positions.append(None)
+    n_ahead = ctx.round - LATEST_ROUND -1
+    # Load average start for driver this season
+    carFeatures["Season Avg Pos"] = ctx.season_value("season avg", (DRIVER, "grid"), driver_season_avg, ctx, ctx.past_races, DRIVER, "grid")
 
-    # Shift recency positions for future races ahead
-    shifted_positions = shift_recency_positions(recency_positions, n_ahead, carFeatures["Season Avg Pos"])
-
-    # Assign recency values (Past1 = most recent, Past2 = second most, etc.)
+    # Shift recency positions for future races ahead (Past1 = most recent, Past2 = second most, etc.)
+    shifted_positions = shift_recency_positions(ctx.season_value("recency", (DRIVER, "grid"), driver_recency, ctx, ctx.past_races, DRIVER, "grid"), n_ahead, carFeatures["Season Avg Pos"])
     for i in range(3):
-        key = f"Past{i+1}"
-        QualiPos["Car"]["Recency Bias"][key] = shifted_positions[i]
-
-
-
-    #Load current consturctors placement for the team this season
-    base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-    path = os.path.join(base_dir, "data", str(SEASON), f"Team Scores.csv")
-    with open(path, "r") as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            if int(row["Race"]) == LATEST_ROUND and is_team_equivalent(TEAM, row["TeamName"]):
-                carFeatures["Team Constructors Championship Placement"] = int(row["Placement"])
-                break
+        QualiPos["Car"]["Recency Bias"][f"Past{i+1}"] = shifted_positions[i]
 
     #Load Team Curr Avg Qualis
-    rounds = []
-    base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-    path = os.path.join(base_dir, "data", str(SEASON), f"schedule.csv")
-    with open(path, "r") as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            if int(row["Race"]) <= LATEST_ROUND:
-                rounds.append(row["Name"])
-
-    finish_sum = 0
-    race_count = 0
-
-    for round_name in rounds:
-        base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-        path = os.path.join(base_dir, "data", str(SEASON), f"{round_name} R.csv")
-        with open(path, "r") as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                if is_team_equivalent(TEAM, row["TeamName"]):
-                    try:
-                        pos = int(float(row["GridPosition"]))
-                        finish_sum += pos
-                        race_count += 1
-                    except Exception:
-                        break  # skip non-finishers or invalid data
-
-    carFeatures["Team Curr Avg"] = finish_sum / race_count if race_count > 0 else 0
+    carFeatures["Team Curr Avg"] = ctx.season_value("curr avg", TEAM, team_curr_avg, ctx, TEAM)
 
     # Team Past Avgs on Track
-    placements = 0
-    races = 0
-
-    for season in range(2020, SEASON):
-        try:
-            base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-            path = os.path.join(base_dir, "data", str(season), f"{TRACK} R.csv")
-            if not os.path.exists(path):
-                continue
-
-            with open(path, "r") as file:
-                reader = csv.DictReader(file)
-                found = False  # only increment races if team is found
-
-                for row in reader:
-                    if is_team_equivalent(TEAM, row["TeamName"]):
-
-                        try:
-                            placements += int(float(row["GridPosition"]))
-                            found = True
-                        except ValueError:
-                            continue
-
-                if found:
-                    races += 1
-
-        except Exception:
-            continue
-
-    carFeatures["Team Past Avg"] = placements / races if races > 0 else 0
+    carFeatures["Team Past Avg"] = ctx.team_value("past avg", TEAM, team_past_avg)
 
     #Driver Past Placements on track
     #Load Average Placements
-
-    placements = 0
-    races = 0
-
-    for season in range(2020, SEASON):
-        path = f"data/{season}/{TRACK} R.csv"
-        if not os.path.exists(path):
-            continue
-
-        try:
-            with open(path, "r") as file:
-                reader = csv.DictReader(file)
-                found = False
-                for row in reader:
-                    if row["FullName"].strip() == DRIVER.strip():
-                        try:
-                            pos = int(float(row["GridPosition"]))
-                            if pos > 0:  # Ignore invalid positions
-                                placements += pos
-                                races += 1
-                                found = True
-                                break  # Stop reading once driver is found
-                        except:
-                            break
-                # races += 1 should *only* happen when driver is found and position is valid
-        except Exception as e:
-            print(f"[WARN] Skipping {season} {TRACK} for {DRIVER}: {e}")
-            continue
-
+    past = ctx.track_index.driver(DRIVER.strip())
+    placements = past["quali"]
+    races = past["qualis"]
     driverFeatures["Driver Past Placements"]["Avg"] = placements / races if races > 0 else None
+
     #Load Car used/Average Constructors Championship
-    constructors = 0
-    races = 0
-    for season in range(2020,SEASON):
-        round = None
-        base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-        path = os.path.join(base_dir, "data", str(season), "schedule.csv")
-        with open(path, "r") as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                if row["Name"] == TRACK:
-                    round = int(row["Race"])
-                    races += 1
-        base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-        path = os.path.join(base_dir, "data", str(season), "Team Scores.csv")
-        with open(path, "r") as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                if int(row["Race"]) == round:
-                    if is_team_equivalent(TEAM, row["TeamName"]):
-                        constructors += int(row["Placement"])
-                        break
-
-    driverFeatures["Driver Past Placements"]["Car Used"] = constructors/races if races > 0 else 0
+    driverFeatures["Driver Past Placements"]["Car Used"] = ctx.team_value("car used", TEAM, past_car_used)
 
    # Load gap to teammate on track
-    gaps = 0
-    races = 0
-
-    for season in range(2020, SEASON):
-        try:
-            base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-            path = os.path.join(base_dir, "data", str(season), f"{TRACK} R.csv")
-            if not os.path.exists(path):
-                continue
-
-            with open(path, "r") as file:
-                reader = list(csv.DictReader(file))  # Cache rows
-
-            currTeam = next((row["TeamName"] for row in reader if row["FullName"] == DRIVER), None)
-            if currTeam is None:
-                continue
-
-            teammate = None
-            driver = None
-            for row in reader:
-                if is_team_equivalent(currTeam, row["TeamName"]):
-                    if row["FullName"] == DRIVER and row["GridPosition"] != "NaN":
-                        driver = int(float(row["GridPosition"]))
-                    elif row["FullName"] != DRIVER and row["GridPosition"] != "NaN":
-                        teammate = int(float(row["GridPosition"]))
-
-            if driver is not None and teammate is not None:
-                races += 1
-                gaps += (teammate - driver)
-            else:
-                print(f"[WARN] {season} — Missing teammate or driver for {DRIVER} in team {currTeam}")
-
-        except Exception as e:
-            print(f"[ERROR] {season}: {e}")
-
-    driverFeatures["Driver Past Placements"]["Teammate Gap"] = gaps / races if races > 0 else None
-        #Load Wet Weather Multiplier
+    gap, messages = ctx.track_index.quali_teammate_gap(DRIVER)
+    for message in messages:
+        print(message)
+    driverFeatures["Driver Past Placements"]["Teammate Gap"] = gap
 
+    #Load Wet Weather Multiplier
     #Past Seasons
-    wetRaces = 0
-    dryRaces = 0
-    avgWet = 0
-    avgDry = 0
-
-    for season in range(2020, SEASON):
-        base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-        path = os.path.join(base_dir, "data", str(season), f"rain.csv")
-        with open(path, "r") as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                if row["Rain"] == "True":
-                    wetRaces += 1
-                    base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-                    path = os.path.join(base_dir, "data", str(season), f"{row['Race']} R.csv")
-                    with open(path, "r") as f:
-                        r = csv.DictReader(f)
-                        for driver in r:
-                            if driver["FullName"] == DRIVER:
-                                try:
-                                    avgWet += int(float(driver["GridPosition"]))
-                                    break
-                                except Exception:
-                                    break
-                else:
-                    dryRaces += 1
-                    base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-                    path = os.path.join(base_dir, "data", str(season), f"{row['Race']} R.csv")
-                    with open(path, "r") as f:
-                        r = csv.DictReader(f)
-                        for driver in r:
-                            if driver["FullName"] == DRIVER:
-                                try:
-                                    avgDry += int(float(driver["GridPosition"]))
-                                    break
-                                except Exception:
-                                    break
-    try:
-        multiplier = (avgDry/dryRaces)/(avgWet/wetRaces)
-    except Exception:
-        multiplier = 1
-
-    driverFeatures["Wet Weather Multiplier"]["Prev Seasons"] = multiplier
-
+    driverFeatures["Wet Weather Multiplier"]["Prev Seasons"] = ctx.season_value("wet past", (DRIVER, "grid"), wet_weather_multiplier, ctx.past_seasons, DRIVER, "grid")
     #This Season
-    wetRaces = 0
-    dryRaces = 0
-    avgWet = 0
-    avgDry = 0
-
-    base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-    path = os.path.join(base_dir, "data", str(SEASON), f"rain.csv")
-    with open(path, "r") as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            if row["Rain"] == "True":
-                wetRaces += 1
-                base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-                path = os.path.join(base_dir, "data", str(SEASON), f"{row['Race']} R.csv")
-                with open(path, "r") as f:
-                    r = csv.DictReader(f)
-                    for driver in r:
-                        if driver["FullName"] == DRIVER:
-                            try:
-                                avgWet += int(float(driver["GridPosition"]))
-                                break
-                            except Exception:
-                                break
-            else:
-                dryRaces += 1
-                base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-                path = os.path.join(base_dir, "data", str(SEASON), f"{row['Race']} R.csv")
-                with open(path, "r") as f:
-                    r = csv.DictReader(f)
-                    for driver in r:
-                        if driver["FullName"] == DRIVER:
-                            try:
-                                avgDry += int(float(driver["GridPosition"]))
-                                break
-                            except Exception:
-                                break
+    driverFeatures["Wet Weather Multiplier"]["This Season"] = ctx.season_value("wet season", (DRIVER, "grid"), wet_weather_multiplier, [ctx.data], DRIVER, "grid")
 
-    try:
-        multiplier = (avgDry/dryRaces)/(avgWet/wetRaces)
-    except Exception:
-        multiplier = 1
+    return QualiPos
 
-    driverFeatures["Wet Weather Multiplier"]["This Season"] = multiplier
+# feature vectors for the whole grid of a race in one pass, one row per driver (drivers whose features fail are left out)
+def build_feature_matrix(builder, season, latest_round, race_name, shared=None):
+    drivers, teams = driversANDteams(season, latest_round)
+    ctx = GridContext(season, latest_round, race_name, shared=shared)
 
-    return QualiPos
+    rows = {}
+    for driver in drivers:
+        try:
+            features = builder(driver, teams[driver], season, race_name, latest_round, ctx=ctx)
+            rows[driver] = flatten_features(features)
+        except Exception as e:
+            print(f"Error building features for {driver}: {e}")
+
+    matrix = pd.DataFrame.from_dict(rows, orient="index")
+    matrix.index.name = "Driver"
+    return matrix
+
+# attach each driver's predicted qualifying Values (from predict_quali_order) as the Qualifying_Predictions_* columns
+def add_quali_predictions(matrix, quali_order):
+    rows = {r["Driver"]: flatten_features({"Qualifying_Predictions": r["Values"]}) for r in quali_order}
+    predictions = pd.DataFrame.from_dict(rows, orient="index").reindex(matrix.index)
+    return pd.concat([matrix, predictions], axis=1)
+
+def build_quali_matrix(season, latest_round, race_name, shared=None):
+    return build_feature_matrix(build_quali_vector, season, latest_round, race_name, shared)
+
+def build_winrate_feature_matrix(season, latest_round, race_name, quali_order=None, shared=None):
+    matrix = build_feature_matrix(build_winrate_feature_vector, season, latest_round, race_name, shared)
+    if quali_order is not None:
+        matrix = add_quali_predictions(matrix, quali_order)
+    return matrix
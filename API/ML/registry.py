@@ -0,0 +1,207 @@
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, NamedTuple
+
+import joblib
+import numpy as np
+
+try:
+    from .forest import CompiledForest, compile_forest, forest_path, load_forest, save_forest, tree_predictions
+except ImportError:  # imported from a training script run in ML/
+    from forest import CompiledForest, compile_forest, forest_path, load_forest, save_forest, tree_predictions
+
+MODEL_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# name -> file written by the training scripts
+MODEL_FILES = {
+    "quali": "f1_qualifying_predictor.pkl",
+    "race": "f1_position_predictor.pkl",
+}
+
+
+class LoadedModel(NamedTuple):
+    name: str
+    path: str
+    model: Any
+    version: str  # short sha256 of the .pkl, changes whenever the model is retrained
+    loaded_at: str
+    load_seconds: float
+
+
+def file_version(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def save_model(model, path):
+    # write to a temp file and rename, so a running API never picks up a half written .pkl;
+    # the compiled forest is written first, so the API finds it already in place when it reloads
+    tmp_path = path + ".tmp"
+    joblib.dump(model, tmp_path)
+    save_forest(compile_forest(model, source=file_version(tmp_path)), forest_path(path))
+    os.replace(tmp_path, path)
+
+
+def warm_up(model, rows=20):
+    # score a dummy grid the way the runners do (every tree on the whole grid), so the first real
+    # request after a swap doesn't pay for first-call overhead
+    tree_predictions(model, np.zeros((rows, model.n_features_in_), dtype=np.float32))
+
+
+def _file_stat(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def compiled_model(path, version):
+    """Memory-mapped CompiledForest of the .pkl, compiling and saving it first if it's missing or stale.
+
+    Every process that maps the same .forest files shares one copy of the arrays through the page
+    cache, so workers don't each hold an unpickled forest and start without unpickling anything.
+    """
+    forest = load_forest(forest_path(path))
+    if forest is not None and forest.source == version:
+        return forest
+    forest = compile_forest(joblib.load(path), source=version)
+    try:
+        save_forest(forest, forest_path(path))
+    except OSError as e:  # read-only model dir, or another worker saving it at the same moment
+        saved = load_forest(forest_path(path))
+        if saved is not None and saved.source == version:
+            return saved
+        print(f"[MODELS] Using {os.path.basename(path)} compiled in memory, couldn't save it: {e}")
+        return forest
+    return load_forest(forest_path(path)) or forest
+
+
+def load_model(name, path, compiled=True):
+    start = time.perf_counter()
+    version = file_version(path)
+    model = compiled_model(path, version) if compiled else joblib.load(path)
+    return LoadedModel(
+        name=name,
+        path=path,
+        model=model,
+        version=version,
+        loaded_at=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        load_seconds=round(time.perf_counter() - start, 3),
+    )
+
+
+class ModelRegistry:
+    """Owns the trained forests for the lifetime of the API process.
+
+    A retrained .pkl is picked up without a restart: reload() (or the watch() thread) loads the new
+    file in the background, warms it up and then swaps the entry in one assignment. Requests read an
+    entry once, so they always get either the old model or the fully loaded new one.
+    """
+
+    def __init__(self, model_dir=MODEL_DIR, files=MODEL_FILES, compiled=True):
+        self.model_dir = model_dir
+        self.files = dict(files)
+        self.compiled = compiled  # serve memory-mapped compiled forests instead of unpickled sklearn ones
+        self._models = {}
+        self._stats = {}  # name -> (mtime, size) of the file the loaded model came from
+        self._failed = {}  # name -> (mtime, size) of a file that didn't load
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._watcher = None
+        self._stop = threading.Event()
+
+    def _load(self, name):
+        path = os.path.join(self.model_dir, self.files[name])
+        stat = _file_stat(path)
+        loaded = load_model(name, path, self.compiled)
+        warm_up(loaded.model)
+        with self._lock:
+            self._models[name] = loaded
+            self._stats[name] = stat
+        return loaded
+
+    def load(self):
+        for name in self.files:
+            loaded = self._load(name)
+            print(f"Loaded {name} model {loaded.version} in {loaded.load_seconds}s")
+
+    def reload(self, force=False):
+        """Load and swap in every model whose file changed since it was loaded; returns the names swapped.
+
+        A file that fails to load keeps the current model and is retried once it changes again.
+        """
+        swapped = []
+        with self._reload_lock:  # one reload at a time, whether from the watcher or an admin call
+            for name, file in self.files.items():
+                path = os.path.join(self.model_dir, file)
+                stat = None
+                try:
+                    stat = _file_stat(path)
+                    if not force and stat in (self._stats.get(name), self._failed.get(name)):
+                        continue
+                    if not force and name in self._models and file_version(path) == self._models[name].version:
+                        with self._lock:
+                            self._stats[name] = stat  # touched, same contents
+                        continue
+                    loaded = self._load(name)
+                except Exception as e:
+                    if self._failed.get(name, False) != stat:  # one message per broken or missing file
+                        print(f"[MODELS] Keeping current {name} model, reload failed: {e}")
+                    self._failed[name] = stat  # not retried until the file changes again
+                    continue
+                swapped.append(name)
+                print(f"Swapped in {name} model {loaded.version} (loaded in {loaded.load_seconds}s)")
+        return swapped
+
+    def watch(self, interval=5.0):
+        # check the .pkl files every interval seconds on a daemon thread and reload the ones that changed
+        if self._watcher is not None or interval <= 0:
+            return
+
+        def run():
+            while not self._stop.wait(interval):
+                self.reload()
+
+        self._stop.clear()
+        self._watcher = threading.Thread(target=run, name="model-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def entry(self, name):
+        try:
+            return self._models[name]
+        except KeyError:
+            raise RuntimeError(f"Model '{name}' is not loaded") from None
+
+    def get(self, name):
+        return self.entry(name).model
+
+    def info(self):
+        return {
+            name: {"file": os.path.basename(m.path), "version": m.version, "loaded_at": m.loaded_at, "load_seconds": m.load_seconds,
+                   "compiled": isinstance(m.model, CompiledForest)}
+            for name, m in self._models.items()
+        }
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_registry():
+    # process-wide registry for callers that aren't handed models (the runners' command line use)
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = ModelRegistry()
+            _default.load()
+    return _default
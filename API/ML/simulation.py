@@ -0,0 +1,135 @@
+import time
+
+import numpy as np
+
+# draws simulated per batch; the latency budget is checked between batches
+BATCH = 2000
+
+# positions that score points, and what they're worth
+POINTS_POSITIONS = 10
+RACE_POINTS = np.array([25, 18, 15, 12, 10, 8, 6, 4, 2, 1], dtype=float)
+
+
+def finishing_orders(tree_preds, draws, rng):
+    """(draws x drivers) simulated finishing orders, as driver indices from P1 down.
+
+    Each draw scores every driver with the prediction of one of their trees picked at random, so
+    a draw follows the spread of the forest instead of only its mean, and ranks the grid on it
+    (lower score = better, exact ties broken at random). tree_preds may be (races x drivers x trees)
+    for several races at once, giving (draws x races x drivers) orders.
+    """
+    *races, drivers, trees = tree_preds.shape
+    flat = tree_preds.reshape(-1, trees)
+    picks = rng.integers(0, trees, size=(draws, len(flat)))
+    scores = flat[np.arange(len(flat)), picks].reshape(draws, *races, drivers)
+    return np.lexsort((rng.random(scores.shape), scores), axis=-1)
+
+
+def order_counts(order):
+    # (entries x positions) count of every entry in every position, from (draws x entries) orders
+    entries = order.shape[-1]
+    # entry e finishing in position p lands in bucket e * entries + p
+    return np.bincount((order * entries + np.arange(entries)).ravel(), minlength=entries * entries).reshape(entries, entries)
+
+
+def race_points(order):
+    # points every driver scores from finishing orders (..., drivers), with the standard top ten points
+    drivers = order.shape[-1]
+    table = np.zeros(drivers)
+    table[:min(drivers, len(RACE_POINTS))] = RACE_POINTS[:drivers]
+    positions = np.empty_like(order)
+    np.put_along_axis(positions, order, np.arange(drivers), axis=-1)
+    return table[positions]
+
+
+def position_counts(tree_preds, draws, rng, budget=None):
+    # (drivers x positions) finishes over up to `draws` simulations, stopping early once `budget`
+    # seconds are spent; returns the counts and the number of draws actually made
+    drivers = tree_preds.shape[0]
+    counts = np.zeros((drivers, drivers), dtype=np.int64)
+    done = 0
+    start = time.perf_counter()
+    while done < draws:
+        size = min(BATCH, draws - done)
+        counts += order_counts(finishing_orders(tree_preds, size, rng))
+        done += size
+        if budget is not None and time.perf_counter() - start > budget:
+            break
+    return counts, done
+
+
+def finishing_distribution(drivers, tree_preds, simulations=10000, seed=None, budget=None):
+    """Monte Carlo finishing-position probabilities for every driver on the grid.
+
+    Returns the number of simulations run (fewer than asked if the budget ran out) and, per driver
+    sorted by expected position, the chance of each position, of winning, a podium and a points finish.
+    """
+    rng = np.random.default_rng(seed)
+    counts, done = position_counts(np.asarray(tree_preds), simulations, rng, budget)
+    probs = counts / max(done, 1)
+    expected = probs @ np.arange(1, len(drivers) + 1)
+
+    distribution = []
+    for i in sorted(range(len(drivers)), key=lambda i: expected[i]):
+        distribution.append({
+            "Driver": drivers[i],
+            "Values": {
+                "Expected Pos": expected[i].item(),
+                "Win": probs[i, 0].item(),
+                "Podium": probs[i, :3].sum().item(),
+                "Points": probs[i, :POINTS_POSITIONS].sum().item(),
+                "Positions": probs[i].tolist(),  # index 0 = P1
+            },
+        })
+    return {"simulations": done, "distribution": distribution}
+
+
+def championship_counts(tree_preds, points, team_of, team_points, draws, rng, budget=None):
+    """Simulated final standings over up to `draws` seasons of the remaining races, within `budget` seconds.
+
+    tree_preds: (races x drivers x trees) tree predictions of every remaining race; points: current
+    points of each driver; team_of: (drivers x teams) 0/1 map of drivers to their constructor;
+    team_points: current points of each constructor. Returns the (drivers x positions) and
+    (teams x positions) championship counts, each driver's and team's summed final points and the
+    number of draws made. Ties on points are broken at random.
+    """
+    drivers, teams = team_of.shape
+    driver_counts = np.zeros((drivers, drivers), dtype=np.int64)
+    team_counts = np.zeros((teams, teams), dtype=np.int64)
+    driver_sums = np.zeros(drivers)
+    team_sums = np.zeros(teams)
+    done = 0
+    start = time.perf_counter()
+    while done < draws:
+        size = min(BATCH, draws - done)
+        gained = race_points(finishing_orders(tree_preds, size, rng)).sum(axis=1)  # (size x drivers)
+        totals = points + gained
+        team_totals = team_points + gained @ team_of
+        driver_counts += order_counts(np.lexsort((rng.random(totals.shape), -totals), axis=-1))
+        team_counts += order_counts(np.lexsort((rng.random(team_totals.shape), -team_totals), axis=-1))
+        driver_sums += totals.sum(axis=0)
+        team_sums += team_totals.sum(axis=0)
+        done += size
+        if budget is not None and time.perf_counter() - start > budget:
+            break
+    return driver_counts, team_counts, driver_sums, team_sums, done
+
+
+def standings_distribution(entries, counts, sums, points, done):
+    # entries ({"Driver": ..., "Team": ...} or {"Team": ...}) sorted by expected final points, each with its
+    # current and expected points and its chance of the title and of every championship position
+    probs = counts / max(done, 1)
+    expected = sums / max(done, 1)
+    standings = []
+    for i in sorted(range(len(entries)), key=lambda i: -expected[i]):
+        standings.append({
+            **entries[i],
+            "Values": {
+                "Points": float(points[i]),
+                "Expected Points": expected[i].item(),
+                "Title": probs[i, 0].item(),
+                "Expected Pos": (probs[i] @ np.arange(1, len(entries) + 1)).item(),
+                "Positions": probs[i].tolist(),  # index 0 = P1
+            },
+        })
+    return standings
@@ -0,0 +1,452 @@
+import glob
+import hashlib
+import os
+import sys
+import threading
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .teams import constructor_ids
+except ImportError:  # run as a script from ML/ (training)
+    from teams import constructor_ids
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+# Columns of the FastF1 results files that the feature code and the API use
+RESULT_COLUMNS = ["FullName", "TeamName", "TeamId", "TeamColor", "HeadshotUrl", "Position", "GridPosition", "Status", "Points"]
+# How the results columns are typed; anything not listed stays text
+SMALL_INT_COLUMNS = ["Position", "GridPosition", "Laps"]  # whole numbers written as "1.0", NaN when missing
+FLOAT_COLUMNS = ["Points"]
+TIME_COLUMNS = ["Q1", "Q2", "Q3", "Time"]  # "0 days 01:31:44.742000" / NaT, kept as float seconds / NaN
+
+
+class RaceResults(NamedTuple):
+    # One race of a season as plain NumPy columns (views into SeasonData.results)
+    season: int
+    round: int
+    name: str
+    driver: np.ndarray
+    team: np.ndarray
+    team_id: np.ndarray  # constructor id of each row, the same across renames
+    position: np.ndarray
+    grid: np.ndarray
+    status: np.ndarray
+    rows: dict  # driver -> index of their first row
+
+    def find(self, driver):
+        # index of the driver's row in this race, or None if they didn't take part
+        return self.rows.get(driver)
+
+
+def season_fingerprint(season_dir):
+    # name, mtime and size of every file in a season folder; changes whenever ingestion rewrites one of them
+    try:
+        entries = sorted((entry.name, entry.stat().st_mtime_ns, entry.stat().st_size) for entry in os.scandir(season_dir) if entry.is_file())
+    except FileNotFoundError:
+        return None
+    # hashlib rather than hash() so the value is the same in every process and can be written to disk
+    return hashlib.sha1(repr(entries).encode()).hexdigest()[:16]
+
+
+def season_digest(season_dir):
+    # hash of the contents of every file in a season folder, unlike the fingerprint it survives a fresh checkout
+    digest = hashlib.sha1()
+    try:
+        names = sorted(entry.name for entry in os.scandir(season_dir) if entry.is_file())
+    except FileNotFoundError:
+        return None
+    for name in names:
+        digest.update(name.encode())
+        with open(os.path.join(season_dir, name), "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()[:16]
+
+
+def _read_csv(path, numeric=()):
+    # Read everything as text so values like "None" in HeadshotUrl survive, then type the numeric columns.
+    # Unparseable numbers ("nan", "") become NaN, so int() on them fails the same way int(float(...)) did.
+    df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    for col in numeric:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df
+
+
+def _read_results_csv(path):
+    df = _read_csv(path, numeric=SMALL_INT_COLUMNS + FLOAT_COLUMNS)
+    for col in TIME_COLUMNS:
+        df[col] = pd.to_timedelta(df[col].replace("NaT", ""), errors="coerce").dt.total_seconds()
+    return df
+
+
+def read_schedule(season_dir):
+    return _read_csv(os.path.join(season_dir, "schedule.csv"), numeric=["Race"]).astype({"Race": int})
+
+
+class Schedule:
+    """One season's calendar with O(1) lookups between round numbers and race names."""
+
+    def __init__(self, frame):
+        self.rounds = [int(rnd) for rnd in frame["Race"]]
+        self.names = frame["Name"].tolist()
+        self._round_of = {}  # name -> round, first entry wins like the old csv scans
+        self._round_of_folded = {}  # same, keyed on the stripped lower-case name
+        self._name_of = {}  # round -> name, last entry wins like the old csv scans
+        for rnd, name in zip(self.rounds, self.names):
+            self._round_of.setdefault(name, rnd)
+            self._round_of_folded.setdefault(name.strip().lower(), rnd)
+            self._name_of[rnd] = name
+        self._race_names = {}
+
+    def __iter__(self):
+        # (round, name) rows in file order
+        return zip(self.rounds, self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        # is this track on the season's calendar
+        return name in self._round_of
+
+    def round_of(self, name):
+        # exact name match, None when the track isn't on this season's calendar
+        return self._round_of.get(name)
+
+    def find_round(self, name):
+        # ignoring case and surrounding spaces, for names that come from a request
+        return self._round_of_folded.get(name.strip().lower())
+
+    def name_of(self, round):
+        return self._name_of.get(round)
+
+    def race_names(self, latest_round=None, before_round=None):
+        # names in schedule order, optionally limited to rounds <= latest_round / < before_round
+        key = (latest_round, before_round)
+        names = self._race_names.get(key)
+        if names is None:
+            names = [
+                name for rnd, name in self
+                if (latest_round is None or rnd <= latest_round) and (before_round is None or rnd < before_round)
+            ]
+            self._race_names[key] = names
+        return list(names)
+
+    def upcoming(self, after_round):
+        # (round, name) of every race after the given round, by round number
+        return sorted(((rnd, name) for rnd, name in self if rnd > after_round), key=lambda race: race[0])
+
+
+class Standings:
+    """Team Scores.csv as cumulative arrays: every constructor's points and placement after every round.
+
+    Row = round, column = constructor, so reading a team's standing at any round is two array lookups.
+    """
+
+    def __init__(self, team_scores):
+        rounds = team_scores["Race"].to_numpy(dtype=np.int64)
+        cids = team_scores["ConstructorId"].to_numpy(dtype=np.int64)
+        self._column = {cid: j for j, cid in enumerate(dict.fromkeys(cids.tolist()))}
+        shape = (int(rounds.max()) + 1 if len(rounds) else 0, len(self._column))
+        self.points = np.full(shape, np.nan)
+        self.placement = np.zeros(shape, dtype=np.int64)  # 0: the team isn't listed after that round
+        points = team_scores["Points"].to_numpy(dtype=float)
+        placement = team_scores["Placement"].to_numpy(dtype=np.int64)
+        for i, (rnd, cid) in enumerate(zip(rounds.tolist(), cids.tolist())):
+            # a team listed twice in a round keeps its last row
+            self.points[rnd, self._column[cid]] = points[i]
+            self.placement[rnd, self._column[cid]] = placement[i]
+
+    def at(self, round, cid):
+        # (points, placement) of the constructor after the round, (None, None) if it isn't listed
+        j = self._column.get(cid)
+        if j is None or not 0 <= round < len(self.placement) or self.placement[round, j] == 0:
+            return None, None
+        return self.points[round, j].item(), self.placement[round, j].item()
+
+
+class PitstopTotals:
+    """Running per-constructor sums of pitstops.csv, so a team's season pitstop time is a lookup.
+
+    Sums are accumulated row by row in file order, the same order the per-team scan added them in.
+    """
+
+    def __init__(self, pitstops):
+        rounds = pitstops["Round"].to_numpy(dtype=np.int64)
+        cids = pitstops["ConstructorId"].to_numpy(dtype=np.int64)
+        self._column = {cid: j for j, cid in enumerate(dict.fromkeys(cids.tolist()))}
+        running = np.zeros(len(self._column))
+        after = {}  # round -> running sums after its last row
+        for rnd, cid, time in zip(rounds.tolist(), cids.tolist(), pitstops["AveragePitStop"].tolist()):
+            running[self._column[cid]] += time
+            after[rnd] = running.copy()
+        self.season = running  # every row of the file
+
+        # row = round: sums over the rounds up to it
+        self.totals = np.zeros((max(after, default=0) + 1, len(self._column)))
+        for rnd in range(1, len(self.totals)):
+            self.totals[rnd] = after.get(rnd, self.totals[rnd - 1])
+
+    def total(self, cid, round=None):
+        # summed average pitstop of the constructor over rounds <= round (every row of the file by default)
+        j = self._column.get(cid)
+        if j is None:
+            return 0.0
+        if round is None:
+            return self.season[j].item()
+        return self.totals[max(0, min(round, len(self.totals) - 1)), j].item()
+
+
+def read_season_csvs(season, season_dir):
+    # every table of a season folder, typed, with all race results stacked in (Round, Race) order
+    schedule = read_schedule(season_dir)
+    team_scores = _read_csv(os.path.join(season_dir, "Team Scores.csv"), numeric=["Race", "Points", "Placement"])
+    pitstops = _read_csv(os.path.join(season_dir, "pitstops.csv"), numeric=["Round", "AveragePitStop"])
+    rain = _read_csv(os.path.join(season_dir, "rain.csv"), numeric=["Round"])
+    rain["Rain"] = rain["Rain"] == "True"
+
+    calendar = Schedule(schedule)
+    frames = []
+    for path in glob.glob(os.path.join(season_dir, "* R.csv")):
+        name = os.path.basename(path)[:-len(" R.csv")]
+        df = _read_results_csv(path)
+        df.insert(0, "Race", name)
+        df.insert(0, "Round", calendar.round_of(name) or 0)
+        df.insert(0, "Season", season)
+        frames.append(df)
+
+    if frames:
+        results = pd.concat(frames, ignore_index=True)
+        # stable sort keeps each file's own row order inside a race
+        results = results.sort_values(["Round", "Race"], kind="stable", ignore_index=True)
+    else:
+        results = pd.DataFrame(columns=["Season", "Round", "Race"] + RESULT_COLUMNS)
+
+    return {
+        "schedule": schedule,
+        "team_scores": team_scores.astype({"Race": int, "Placement": int}),
+        "pitstops": pitstops.astype({"Round": int}),
+        "rain": rain.astype({"Round": int}),
+        "results": results,
+    }
+
+
+def _encode_table(arrays, table, df):
+    # one array per column: small ints as int16 with -1 for missing, text dictionary-encoded as codes + values
+    types = []
+    for col in df.columns:
+        key = f"{table}.{col}"
+        values = df[col]
+        if col in SMALL_INT_COLUMNS:
+            arrays[key] = values.fillna(-1).to_numpy(dtype=np.int16)
+            types.append("smallint")
+        elif pd.api.types.is_bool_dtype(values):
+            arrays[key] = values.to_numpy(dtype=bool)
+            types.append("bool")
+        elif pd.api.types.is_integer_dtype(values):
+            arrays[key] = values.to_numpy(dtype=np.int32)
+            types.append("int")
+        elif pd.api.types.is_float_dtype(values):
+            arrays[key] = values.to_numpy(dtype=np.float64)
+            types.append("float")
+        else:
+            uniques, codes = np.unique(values.to_numpy(dtype=str), return_inverse=True)
+            arrays[key] = codes.astype(np.int32)
+            arrays[key + ".values"] = uniques
+            types.append("str")
+    arrays[f"{table}.columns"] = np.array(df.columns, dtype=str)
+    arrays[f"{table}.types"] = np.array(types, dtype=str)
+
+
+def _decode_table(arrays, table):
+    columns = {}
+    for col, kind in zip(arrays[f"{table}.columns"].tolist(), arrays[f"{table}.types"].tolist()):
+        values = arrays[f"{table}.{col}"]
+        if kind == "smallint":
+            columns[col] = np.where(values < 0, np.nan, values)
+        elif kind == "int":
+            columns[col] = values.astype(np.int64)
+        elif kind == "str":
+            columns[col] = pd.array(arrays[f"{table}.{col}.values"][values], dtype=str)
+        else:
+            columns[col] = values
+    return pd.DataFrame(columns)
+
+
+def compact_path(season, data_dir=DATA_DIR):
+    # typed, single-file copy of a season folder; the CSVs stay the ingest format
+    return os.path.join(data_dir, "compact", f"{season}.npz")
+
+
+def convert_season(season, data_dir=DATA_DIR):
+    # write data/compact/<season>.npz from the season's CSVs, tagged with their content hash
+    season_dir = os.path.join(data_dir, str(season))
+    source = season_digest(season_dir)
+    tables = read_season_csvs(season, season_dir)
+    arrays = {"source": np.array(source)}
+    for table, df in tables.items():
+        _encode_table(arrays, table, df)
+
+    path = compact_path(season, data_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp.npz"
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_season_file(season_dir, path):
+    # tables from a compact season file, or None if it's missing or the CSVs changed since it was written
+    try:
+        with np.load(path) as file:
+            arrays = {key: file[key] for key in file.files}
+    except FileNotFoundError:
+        return None
+    if str(arrays["source"]) != season_digest(season_dir):
+        print(f"{path} is out of date with {season_dir}, reading the CSVs instead")
+        return None
+    return {table: _decode_table(arrays, table) for table in ("schedule", "team_scores", "pitstops", "rain", "results")}
+
+
+class SeasonData:
+    """Every data/<season>/ file for one season, parsed once into typed columns."""
+
+    def __init__(self, season, season_dir):
+        self.season = season
+        self.season_dir = season_dir
+        # taken before reading so a write that lands mid-load still shows up as a change
+        self.fingerprint = season_fingerprint(season_dir)
+
+        data_dir = os.path.dirname(season_dir)
+        tables = read_season_file(season_dir, compact_path(season, data_dir)) or read_season_csvs(season, season_dir)
+        self.schedule = Schedule(tables["schedule"])
+        self.rain = tables["rain"]
+
+        # constructor ids, results first so names only seen in the other files can join a lineage through TeamId
+        results = tables["results"]
+        results["ConstructorId"] = constructor_ids(results["TeamName"].tolist(), results["TeamId"].tolist())
+        self.team_scores = tables["team_scores"]
+        self.team_scores["ConstructorId"] = constructor_ids(self.team_scores["TeamName"].tolist())
+        self.standings = Standings(self.team_scores)
+        # a few Ergast rounds come back with overflowed durations (e.g. -307445732.604): drop anything that
+        # isn't a real pitstop time so it never reaches the season totals or the past-on-track averages
+        pitstops = tables["pitstops"]
+        valid = np.isfinite(pitstops["AveragePitStop"].to_numpy(dtype=float)) & (pitstops["AveragePitStop"].to_numpy(dtype=float) >= 0)
+        self.pitstops = pitstops[valid].reset_index(drop=True)
+        self.pitstops["ConstructorId"] = constructor_ids(self.pitstops["Team"].tolist())
+        self.pitstop_totals = PitstopTotals(self.pitstops)
+
+        self.results = results.set_index(["Season", "Round", "FullName", "TeamName"], drop=False)
+
+        driver = results["FullName"].to_numpy(dtype=object)
+        team = results["TeamName"].to_numpy(dtype=object)
+        team_id = results["ConstructorId"].to_numpy(dtype=np.int64)
+        position = results["Position"].to_numpy(dtype=float)
+        grid = results["GridPosition"].to_numpy(dtype=float)
+        status = results["Status"].to_numpy(dtype=object)
+
+        self.races = {}
+        bounds = np.flatnonzero(results["Race"].to_numpy()[1:] != results["Race"].to_numpy()[:-1]) + 1
+        for start, stop in zip(np.r_[0, bounds], np.r_[bounds, len(results)]):
+            if start == stop:
+                continue
+            name = results["Race"].iat[start]
+            s = slice(start, stop)
+            rows = {}
+            for i, name_i in enumerate(driver[s]):
+                rows.setdefault(name_i, i)
+            self.races[name] = RaceResults(season, int(results["Round"].iat[start]), name, driver[s], team[s], team_id[s], position[s], grid[s], status[s], rows)
+
+    def has_race(self, name):
+        return name in self.races
+
+    def race(self, name):
+        # Same failure as opening a results file that was never written
+        try:
+            return self.races[name]
+        except KeyError:
+            raise FileNotFoundError(os.path.join(self.season_dir, f"{name} R.csv")) from None
+
+    def round_of(self, name):
+        return self.schedule.round_of(name)
+
+    def race_names(self, latest_round=None, before_round=None):
+        return self.schedule.race_names(latest_round, before_round)
+
+
+class ResultsStore:
+    """Process-wide cache of SeasonData, loaded lazily one season at a time."""
+
+    def __init__(self, data_dir=DATA_DIR):
+        self.data_dir = data_dir
+        self._seasons = {}
+        self._schedules = {}  # season -> (schedule.csv mtime and size, Schedule)
+        self._lock = threading.Lock()
+
+    def season(self, season):
+        season = int(season)
+        data = self._seasons.get(season)
+        if data is None:
+            with self._lock:
+                data = self._seasons.get(season)
+                if data is None:
+                    data = SeasonData(season, os.path.join(self.data_dir, str(season)))
+                    self._seasons[season] = data
+        return data
+
+    def schedule(self, season):
+        # just the calendar, without loading the season's results; re-read whenever schedule.csv changes
+        season_dir = os.path.join(self.data_dir, str(int(season)))
+        stat = os.stat(os.path.join(season_dir, "schedule.csv"))
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        cached = self._schedules.get(int(season))
+        if cached is None or cached[0] != stamp:
+            cached = (stamp, Schedule(read_schedule(season_dir)))
+            with self._lock:
+                self._schedules[int(season)] = cached
+        return cached[1]
+
+    def fingerprint(self, seasons):
+        # current fingerprints of the given seasons; cached seasons whose files changed are dropped and re-read on next use
+        prints = []
+        for season in seasons:
+            season = int(season)
+            current = season_fingerprint(os.path.join(self.data_dir, str(season)))
+            with self._lock:
+                data = self._seasons.get(season)
+                if data is not None and data.fingerprint != current:
+                    del self._seasons[season]
+            prints.append(current)
+        return tuple(prints)
+
+    def reload(self, season=None):
+        # drop cached seasons so the next lookup re-reads the files (e.g. after raceAddition.py)
+        with self._lock:
+            if season is None:
+                self._seasons.clear()
+                self._schedules.clear()
+            else:
+                self._seasons.pop(int(season), None)
+                self._schedules.pop(int(season), None)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ResultsStore()
+    return _store
+
+
+if __name__ == "__main__":
+    # run after helpers/raceAddition.py: python store.py [season ...] (default: every season folder)
+    seasons = [int(arg) for arg in sys.argv[1:]] or sorted(int(name) for name in os.listdir(DATA_DIR) if name.isdigit())
+    for season in seasons:
+        print(f"Wrote {convert_season(season)}")
@@ -0,0 +1,48 @@
+import threading
+import zlib
+
+import numpy as np
+
+# Constructor lineages keyed by the current FastF1 TeamId: every TeamId and team name the team has raced
+# under, including the spellings pitstops.csv and Team Scores.csv use for it
+LINEAGES = {
+    "mercedes": ["mercedes", "Mercedes"],
+    "red_bull": ["red_bull", "Red Bull Racing", "Red Bull"],
+    "ferrari": ["ferrari", "Ferrari"],
+    "mclaren": ["mclaren", "McLaren"],
+    "aston_martin": ["aston_martin", "Aston Martin", "racing_point", "Racing Point"],
+    "alpine": ["alpine", "Alpine", "renault", "Renault"],
+    "rb": ["rb", "Racing Bulls", "RB", "alphatauri", "AlphaTauri"],
+    "sauber": ["sauber", "Kick Sauber", "alfa", "Alfa Romeo", "Alfa Romeo Racing"],
+    "haas": ["haas", "Haas F1 Team", "Haas"],
+    "williams": ["williams", "Williams"],
+}
+
+# ids for names outside LINEAGES start here, derived from the name so they're the same in every process
+UNKNOWN_BASE = 1000
+
+# name or TeamId -> constructor id; grows as seasons with new names are loaded
+_ids = {name: i for i, names in enumerate(LINEAGES.values()) for name in names}
+_lock = threading.Lock()
+
+
+def constructor_id(name, team_id=None):
+    # stable integer for a team; a name we haven't seen joins its TeamId's lineage when there is one
+    cid = _ids.get(name)
+    if cid is not None:
+        return cid
+    with _lock:
+        cid = _ids.get(team_id) if team_id else None
+        if cid is None:
+            cid = UNKNOWN_BASE + zlib.crc32(str(team_id or name).encode())
+            if team_id:
+                _ids[team_id] = cid
+        _ids[name] = cid
+    return cid
+
+
+def constructor_ids(names, team_ids=None):
+    # constructor id of every row, as an int array usable in vectorized masks
+    if team_ids is None:
+        team_ids = [None] * len(names)
+    return np.array([constructor_id(name, team_id) for name, team_id in zip(names, team_ids)], dtype=np.int64)
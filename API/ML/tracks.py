@@ -0,0 +1,162 @@
+import threading
+
+import numpy as np
+
+
+class TrackIndex:
+    """Everything the "past on track" features read about one track, from every season before the current one.
+
+    Built once per (track, season) from the already loaded SeasonData and shared by every driver and
+    team on the grid, so each feature is a dict lookup instead of a pass over the track's past races.
+    """
+
+    def __init__(self, track, past_seasons):
+        self.track = track
+        # (season, results) of this track in every previous season it was held
+        self.history = [(past.season, past.races[track]) for past in past_seasons if past.has_race(track)]
+        self.held = len(self.history)
+
+        self._drivers = {}
+        self._quali_gaps = {}
+        self._team_grids = {}
+        for season, race in self.history:
+            for driver, i in race.rows.items():
+                self._add_driver(driver, race.position[i], race.grid[i])
+            for cid in dict.fromkeys(race.team_id.tolist()):
+                grid = [race.grid[i] for i in np.flatnonzero(race.team_id == cid) if not np.isnan(race.grid[i])]
+                if grid:
+                    total, races = self._team_grids.get(cid, (0, 0))
+                    self._team_grids[cid] = (total + sum(int(pos) for pos in grid), races + 1)
+        for driver in self._drivers:
+            self._quali_gaps[driver] = self._quali_teammate_gap(driver)
+
+        # constructors standings and pitstops of the round the track was on the calendar
+        self.scheduled = 0
+        self._placements = {}
+        self._pitstops = {}
+        for past in past_seasons:
+            rnd = past.round_of(track)
+            if rnd is None:
+                continue
+            self.scheduled += 1
+            scores = past.team_scores
+            first = {}
+            for i in np.flatnonzero(scores["Race"].to_numpy() == rnd):
+                first.setdefault(scores["ConstructorId"].iat[i], i)
+            for cid, i in first.items():
+                self._placements[cid] = self._placements.get(cid, 0) + int(scores["Placement"].iat[i])
+            if not rnd:
+                continue
+            pitstops = past.pitstops
+            first = {}
+            for i in np.flatnonzero(pitstops["Round"].to_numpy() == rnd):
+                first.setdefault(pitstops["ConstructorId"].iat[i], i)
+            for cid, i in first.items():
+                total, count = self._pitstops.get(cid, (0, 0))
+                self._pitstops[cid] = (total + float(pitstops["AveragePitStop"].iat[i]), count + 1)
+
+        self._race_gaps = {}
+
+    def _add_driver(self, driver, position, grid):
+        stats = self._drivers.setdefault(driver, {"gained": 0, "finish": 0, "start": 0, "starts": 0, "quali": 0, "qualis": 0})
+        if not np.isnan(position) and not np.isnan(grid):
+            stats["gained"] += int(position) - int(grid)
+        if not np.isnan(position):
+            stats["finish"] += int(position)
+        if not np.isnan(grid):
+            stats["start"] += int(grid)
+            stats["starts"] += 1
+            if int(grid) > 0:  # Ignore invalid positions
+                stats["quali"] += int(grid)
+                stats["qualis"] += 1
+
+    def driver(self, driver):
+        # sums of the driver's first row in every past race here (zeros if they never raced it):
+        # gained (finish - grid), finish, start/starts (grid), quali/qualis (grid > 0)
+        return self._drivers.get(driver) or {"gained": 0, "finish": 0, "start": 0, "starts": 0, "quali": 0, "qualis": 0}
+
+    def _quali_teammate_gap(self, driver):
+        # average grid gap to the teammate of the team they drove for in each past race here, plus the log lines
+        gaps = 0
+        races = 0
+        messages = []
+        for season, race in self.history:
+            i = race.find(driver)
+            if i is None:
+                continue
+            curr_team = race.team[i]
+
+            teammate = None
+            drv = None
+            try:
+                for j in np.flatnonzero(race.team_id == race.team_id[i]):
+                    if race.driver[j] == driver:
+                        drv = int(race.grid[j])
+                    else:
+                        teammate = int(race.grid[j])
+            except ValueError as e:
+                messages.append(f"[ERROR] {season}: {e}")
+                continue
+
+            if drv is not None and teammate is not None:
+                races += 1
+                gaps += (teammate - drv)
+            else:
+                messages.append(f"[WARN] {season} — Missing teammate or driver for {driver} in team {curr_team}")
+        return (gaps / races if races > 0 else None), messages
+
+    def quali_teammate_gap(self, driver):
+        return self._quali_gaps.get(driver, (None, []))
+
+    def race_teammate_gap(self, driver, cid):
+        # average finishing gap to whoever drove for the given constructor alongside the driver in past races here
+        key = (driver, cid)
+        if key not in self._race_gaps:
+            gaps = 0
+            races = 0
+            for season, race in self.history:
+                drv = 0
+                teammate = 0
+                try:
+                    for j in np.flatnonzero(race.team_id == cid):
+                        if race.driver[j] == driver:
+                            drv = int(race.position[j])
+                        else:
+                            teammate = int(race.position[j])
+                except ValueError:
+                    continue
+                if drv != 0 and teammate != 0:
+                    races += 1
+                if drv == 0:
+                    continue
+                gaps += (teammate - drv)
+            self._race_gaps[key] = gaps / races if races > 0 else None
+        return self._race_gaps[key]
+
+    def team_past_avg(self, cid):
+        # average of the team's summed grid positions per past race here
+        total, races = self._team_grids.get(cid, (0, 0))
+        return total / races if races > 0 else 0
+
+    def car_used(self, cid):
+        # average constructors placement after this round, over every past season the track was on the calendar
+        return self._placements.get(cid, 0) / self.scheduled if self.scheduled > 0 else 0
+
+    def pitstops(self, cid):
+        total, count = self._pitstops.get(cid, (0, 0))
+        return (total / count) if count > 0 else 0
+
+
+_indexes = {}  # (track, season) -> (SeasonData objects it was built from, TrackIndex)
+_indexes_lock = threading.Lock()
+
+
+def track_index(track, season, past_seasons):
+    # cached TrackIndex, rebuilt when any of the past seasons was reloaded from changed files
+    key = (track, season)
+    cached = _indexes.get(key)
+    if cached is None or len(cached[0]) != len(past_seasons) or any(a is not b for a, b in zip(cached[0], past_seasons)):
+        cached = (tuple(past_seasons), TrackIndex(track, past_seasons))
+        with _indexes_lock:
+            _indexes[key] = cached
+    return cached[1]
@@ -0,0 +1,128 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from .Quali_runner import predict_quali_order
+from .Race_runner import predict_finishing_distribution, predict_race_order
+from .registry import ModelRegistry
+from .Season_runner import project_season
+from .store import get_store
+
+# registry the prediction functions below read from in this process
+_models = None
+_own_registry = False  # a process worker's own copy, rather than the API's registry shared with its threads
+
+
+def use_models(registry, own=False):
+    global _models, _own_registry
+    _models = registry
+    _own_registry = own
+
+
+def _init_process(watch):
+    # process workers can't share the API's registry, so each one loads its own copy once
+    # and follows retrained files with its own watcher
+    registry = ModelRegistry()
+    registry.load()
+    registry.watch(watch)
+    use_models(registry, own=True)
+
+
+def _refresh_data(season):
+    # drop any season this process has cached whose files were re-ingested since
+    get_store().fingerprint(range(2020, season + 1))
+
+
+def _refresh_models(wanted):
+    """({name: model}, ((name, version), ...)) to predict with, for the models the API asked for.
+
+    wanted: name -> version the API is serving. A process worker behind it (reloaded through
+    POST /Models/reload, or by a watcher that hasn't fired here yet, or not at all with the watcher
+    off) picks up the changed files first. The versions returned are the ones actually used, so
+    results are cached under the model that produced them even if the worker still differs.
+    """
+    if _own_registry and any(_models.entry(name).version != version for name, version in wanted.items()):
+        _models.reload()
+    entries = {name: _models.entry(name) for name in wanted}
+    return {name: entry.model for name, entry in entries.items()}, tuple((name, entry.version) for name, entry in entries.items())
+
+
+def run_quali(wanted, season, round_number, race_name):
+    _refresh_data(season)
+    used, versions = _refresh_models(wanted)
+    return predict_quali_order(season, round_number, race_name, used["quali"]), versions
+
+
+def run_race(wanted, season, round_number, race_name, order):
+    _refresh_data(season)
+    used, versions = _refresh_models(wanted)
+    return predict_race_order(season, round_number, race_name, used["race"], order=order), versions
+
+
+def run_distribution(wanted, season, round_number, race_name, order, simulations, seed, budget):
+    _refresh_data(season)
+    used, versions = _refresh_models(wanted)
+    return predict_finishing_distribution(season, round_number, race_name, used["race"], order, simulations, seed, budget), versions
+
+
+def run_season(wanted, season, round_number, simulations, seed, budget):
+    _refresh_data(season)
+    used, versions = _refresh_models(wanted)
+    return project_season(season, round_number, used["quali"], used["race"], simulations, seed, budget), versions
+
+
+class PoolBusyError(RuntimeError):
+    pass
+
+
+class PredictionPool:
+    """Runs blocking prediction work off the event loop on a thread or process pool.
+
+    At most workers + max_queue predictions are accepted at once; anything past that fails fast
+    with PoolBusyError instead of piling up behind a long queue.
+    """
+
+    def __init__(self, kind="thread", workers=None, max_queue=32):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown pool kind '{kind}', expected 'thread' or 'process'")
+        self.kind = kind
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self.rejected = 0
+        self._executor = None
+
+    def start(self, registry, watch=0):
+        if self.kind == "process":
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_process, initargs=(watch,))
+        else:
+            use_models(registry)
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="predict")
+
+    def shutdown(self):
+        if self._executor is not None:
+            # queued work is cancelled, but wait for the running calls and the executor's management thread,
+            # which otherwise outlives the process pool at interpreter exit ("Bad file descriptor" traceback)
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def run(self, fn, *args):
+        # only ever touched from the event loop thread, so the counter needs no lock
+        if self.in_flight >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise PoolBusyError("Prediction queue is full, try again shortly")
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            self.in_flight -= 1
+
+    def stats(self):
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "rejected": self.rejected,
+        }
@@ -1,14 +1,93 @@
-from fastapi import FastAPI, Request
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
+from typing import Optional
 import os
-import joblib
-import pandas as pd
-import csv
-from ML.Quali_runner import predict_quali_order
-from ML.Race_runner import predict_race_order
+import asyncio
+from ML.store import get_store
+from ML.registry import ModelRegistry
+from ML.cache import PredictionCache
+from ML.workers import PredictionPool, run_distribution, run_quali, run_race, run_season
 
-app = FastAPI()
+# Both forests are loaded once when the app starts and shared by every request; retrained .pkl files are
+# swapped in without a restart, checked every F1_MODEL_WATCH seconds (0 turns the watcher off)
+models = ModelRegistry()
+MODEL_WATCH = float(os.environ.get("F1_MODEL_WATCH", 5))
+
+# Finished predictions, keyed on the request plus the model versions and data files they came from
+predictions = PredictionCache(maxsize=256, ttl=6 * 60 * 60)
+
+# Predictions run on a thread or process pool so the event loop keeps serving other requests.
+# F1_POOL=thread|process, F1_POOL_WORKERS (default: cpu count), F1_POOL_QUEUE (waiting requests before rejecting)
+pool = PredictionPool(
+    kind=os.environ.get("F1_POOL", "thread"),
+    workers=int(os.environ.get("F1_POOL_WORKERS", 0)) or None,
+    max_queue=int(os.environ.get("F1_POOL_QUEUE", 32)),
+)
+
+async def cached_prediction(kind, req, model_names, fn, *args, inputs=()):
+    """(prediction, model versions behind it), from the cache or run on the pool.
+
+    inputs: (name, version) pairs of the models behind predictions passed in as arguments (the
+    qualifying order fed to the race model). The worker may not run the version this registry serves
+    (a process worker that hasn't picked up a reload yet), so a new result is cached under the
+    versions it reports having used.
+    """
+    # features read every season from 2020 up to the requested one
+    data = get_store().fingerprint(range(2020, req.season + 1))
+    wanted = {name: models.entry(name).version for name in model_names}
+    versions = tuple(wanted.items()) + tuple(inputs)
+    key = (kind, req.season, req.round, getattr(req, "race_name", None), versions, data)
+    found, value = predictions.get(key)
+    if found:
+        return value, versions
+    value, used = await pool.run(fn, wanted, *args)
+    versions = used + tuple(inputs)
+    predictions.put((kind, req.season, req.round, getattr(req, "race_name", None), versions, data), value)
+    return value, versions
+
+async def quali_prediction(req):
+    # (qualifying order, versions of the model behind it)
+    return await cached_prediction("quali", req, ["quali"], run_quali, req.season, req.round, req.race_name)
+
+async def race_prediction(req):
+    # (quali, race) - the race model reuses the cached qualifying prediction instead of re-running it
+    quali, quali_versions = await quali_prediction(req)
+    race, _ = await cached_prediction("race", req, ["race"], run_race, req.season, req.round, req.race_name, quali, inputs=quali_versions)
+    return quali, race
+
+# Finishing-position simulations: at most F1_SIMULATIONS_MAX draws per request, cut short after F1_SIMULATION_BUDGET_MS
+MAX_SIMULATIONS = int(os.environ.get("F1_SIMULATIONS_MAX", 100000))
+SIMULATION_BUDGET = float(os.environ.get("F1_SIMULATION_BUDGET_MS", 250)) / 1000
+
+async def distribution_prediction(req):
+    simulations = max(1, min(req.simulations, MAX_SIMULATIONS))
+    quali, quali_versions = await quali_prediction(req)
+    distribution, _ = await cached_prediction(f"distribution {simulations} {req.seed}", req, ["race"], run_distribution,
+                                              req.season, req.round, req.race_name, quali, simulations, req.seed, SIMULATION_BUDGET,
+                                              inputs=quali_versions)
+    return distribution
+
+# Season projections simulate every remaining race per draw, so they get their own budget (F1_SEASON_BUDGET_MS)
+SEASON_BUDGET = float(os.environ.get("F1_SEASON_BUDGET_MS", 1000)) / 1000
+
+async def season_projection(req):
+    simulations = max(1, min(req.simulations, MAX_SIMULATIONS))
+    projection, _ = await cached_prediction(f"season {simulations} {req.seed}", req, ["race", "quali"], run_season,
+                                            req.season, req.round, simulations, req.seed, SEASON_BUDGET)
+    return projection
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    models.load()
+    models.watch(MODEL_WATCH)
+    pool.start(models, MODEL_WATCH)
+    yield
+    pool.shutdown()
+    models.stop()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -17,23 +96,48 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-model_path = os.path.join("ML", "f1_qualifying_predictor.pkl")
-qualifying_model = joblib.load(model_path)
-
 @app.get("/")
 async def root():
     return {"message": "F1 Prediction API is running!"}
 
+@app.get("/Models")
+async def modelInfo():
+    return {"status": "ok", "models": models.info()}
+
+@app.post("/Models/reload")
+async def reloadModels(force: bool = False):
+    # load any retrained model off the event loop, then swap it in; requests keep using the old one meanwhile
+    swapped = await asyncio.to_thread(models.reload, force)
+    return {"status": "ok", "swapped": swapped, "models": models.info()}
+
+@app.get("/Cache")
+async def cacheStats():
+    return {"status": "ok", "predictions": predictions.stats()}
+
+@app.get("/Pool")
+async def poolStats():
+    return {"status": "ok", "pool": pool.stats()}
+
 
 class PredictionRequest(BaseModel):
     season: int
     round: int
     race_name: str
 
+class DistributionRequest(PredictionRequest):
+    simulations: int = 10000
+    seed: Optional[int] = None
+
+class SeasonRequest(BaseModel):
+    season: int
+    round: int
+    simulations: int = 10000
+    seed: Optional[int] = None
+
 @app.post("/predict-Quali")
 async def predictQuali(req: PredictionRequest):
     try:
-        results = predict_quali_order(req.season, req.round, req.race_name, qualifying_model)
+        results, _ = await quali_prediction(req)
         return {"status": "ok", "predictions": results}
     except Exception as e:
         return {"status": "error", "message": str(e)}
@@ -41,67 +145,71 @@ async def predictQuali(req: PredictionRequest):
 @app.post("/predict-Race")
 async def predictRace(req: PredictionRequest):
     try:
-        results = predict_race_order(req.season, req.round, req.race_name)
+        quali, results = await race_prediction(req)
         return {"status": "ok", "predictions": results}
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
+@app.post("/predict-Distribution")
+async def predictDistribution(req: DistributionRequest):
+    # each driver's chance of every finishing position, a win, a podium and points, from simulated races
+    try:
+        results = await distribution_prediction(req)
+        return {"status": "ok", **results}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+@app.post("/predict-Season")
+async def predictSeason(req: SeasonRequest):
+    # drivers' and constructors' championship chances, simulating every race after the given round
+    try:
+        results = await season_projection(req)
+        return {"status": "ok", **results}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
 @app.post("/Upcoming-Races")
 async def upcomingRaces(req: PredictionRequest):
-    base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-    path = os.path.join(base_dir, "ML", "data", str(req.season), "schedule.csv")
-    upcoming = []
     try:
-        with open(path, "r") as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                try:
-                    race_num = int(float(row["Race"]))
-                    if race_num > req.round:
-                        upcoming.append({
-                            "Race": race_num,
-                            "Name": row["Name"]
-                        })
-                except ValueError:
-                    # Skip invalid rows
-                    continue
-
-        # Sort by race number just in case CSV is unordered
-        upcoming.sort(key=lambda r: r["Race"])
-
+        schedule = get_store().schedule(req.season)
     except FileNotFoundError:
         return {"status": "error", "message": f"Schedule for {req.season} not found"}
-    
+
+    upcoming = [{"Race": race_num, "Name": name} for race_num, name in schedule.upcoming(req.round)]
     return {"status": "ok", "upcoming": upcoming}
 
-@app.post("/Driver-Photos")
-async def driverPhotos(req: PredictionRequest):
-    base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-    path = os.path.join(base_dir, "ML", "data", str(req.season), "schedule.csv")
+# photo, team colour and team of every driver in the given round's results. Blocking: loading a season
+# (first access, or after a re-ingest) takes a while, so the endpoints run it with asyncio.to_thread
+def driver_photos(season, round):
+    data = get_store().season(season)
     pictures = []
-    race = None
-    with open(path, "r") as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            if int(row["Race"]) == req.round:
-                race = row["Name"]
-    
+    race = data.schedule.name_of(round)
+
     if not race:
         return pictures
-    base_dir = os.path.dirname(os.path.abspath(__file__))  # directory of model.py
-    path = os.path.join(base_dir, "ML", "data", str(req.season), f"{race} R.csv")
-    with open(path, "r") as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            if row["FullName"] == "Franco Colapinto":
-                pictures.append({"Driver": row["FullName"],
-                              "Image": "https://e2.365dm.com/f1/drivers/256x256/h_full_1563.png", 
-                              "Color": row["TeamColor"],
-                              "Team": row["TeamName"]})
-            else:
-                pictures.append({"Driver": row["FullName"],
-                                "Image": row["HeadshotUrl"],
-                                "Color": row["TeamColor"],
-                                "Team": row["TeamName"]})
-    
+    if not data.has_race(race):
+        raise FileNotFoundError(f"Results for {race} {season} not found")
+    results = data.results[data.results["Race"] == race]
+    for driver, image, color, team in zip(results["FullName"], results["HeadshotUrl"], results["TeamColor"], results["TeamName"]):
+        if driver == "Franco Colapinto":
+            image = "https://e2.365dm.com/f1/drivers/256x256/h_full_1563.png"
+        pictures.append({"Driver": driver,
+                        "Image": image,
+                        "Color": color,
+                        "Team": team})
+
     return pictures
+
+@app.post("/Driver-Photos")
+async def driverPhotos(req: PredictionRequest):
+    return await asyncio.to_thread(driver_photos, req.season, req.round)
+
+@app.post("/predict-Weekend")
+async def predictWeekend(req: PredictionRequest):
+    # qualifying order, race order and driver photos in one response; qualifying is only predicted once
+    try:
+        quali, race = await race_prediction(req)
+        drivers = await asyncio.to_thread(driver_photos, req.season, req.round)
+        return {"status": "ok", "quali": quali, "race": race, "drivers": drivers}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
@@ -85,43 +85,28 @@ export default function App() {
         race_name: selectedRace,
       };
 
-      const [qualiRes, raceRes] = await Promise.all([
-        fetch(`http://${IP}:8000/predict-Quali`, {
-          method: "POST",
-          headers: { "Content-Type": "application/json" },
-          body: JSON.stringify(payload),
-        }),
-        fetch(`http://${IP}:8000/predict-Race`, {
-          method: "POST",
-          headers: { "Content-Type": "application/json" },
-          body: JSON.stringify(payload),
-        }),
-      ]);
-      setCurrRace(selectedRace)
-      const qualiData = await qualiRes.json();
-      const raceData = await raceRes.json();
-
-      if (qualiData.status === "ok") setQualiPredictions(qualiData.predictions);
-      else setError(qualiData.message || "Error fetching qualifying predictions");
-
-      if (raceData.status === "ok") setRacePredictions(raceData.predictions);
-      else setError(raceData.message || "Error fetching race predictions");
-
-      // Fetch driver images
-      const imgRes = await fetch(`http://${IP}:8000/Driver-Photos/`, {
+      // One request returns qualifying, race and driver info; qualifying is only predicted once
+      const res = await fetch(`http://${IP}:8000/predict-Weekend`, {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify(payload),
       });
-      const imgData = await imgRes.json();
-      console.log(imgData)
+      setCurrRace(selectedRace)
+      const data = await res.json();
+
+      if (data.status !== "ok") {
+        setError(data.message || "Error fetching predictions");
+        return;
+      }
+      setQualiPredictions(data.quali);
+      setRacePredictions(data.race);
 
       // Store the full array so hover can use Color, etc.
-      setDriverPhotos(imgData);
+      setDriverPhotos(data.drivers);
 
 
       const imgMap = {};
-      imgData.forEach((d) => {
+      data.drivers.forEach((d) => {
         imgMap[d.Driver] = d.Image !== "None" ? d.Image : null;
       });
       setDriverImages(imgMap);